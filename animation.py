@@ -1,13 +1,21 @@
+import queue
 import tkinter as tk
 
 import numpy as np
 
-from geometry_tools import Point, Polygon
+from geometry_tools import Polygon
 from lloyd_algorithm import ContinuousLloydAlgorithm
+from rendering import CELL_COLORS, FrameProducer, cell_rings
 
 
 class Animation:
-    def __init__(self, root, screen_width, screen_height, boundary, num_prototypes):
+    """Tk animation of a Lloyd run. The iterations run in a FrameProducer
+    worker thread; every tick draws the latest frame it published, moving
+    the existing canvas items instead of recreating them."""
+
+    def __init__(
+        self, root, screen_width, screen_height, boundary, num_prototypes, every=1
+    ):
         self.root = root
         self.root.title("Voronoi Animation")
 
@@ -36,19 +44,15 @@ class Animation:
         self.lloyd = ContinuousLloydAlgorithm(self.boundary, self.n_prototypes)
 
         # Assign colors from a more aesthetically pleasing palette
-        self.cell_colors = [
-            "#FFC300",
-            "#DAF7A6",
-            "#FF5733",
-            "#C70039",
-            "#6857E6",
-            "#FF6F61",
-            "#5E503F",
-            "#00A8CC",
-            "#F5D0C4",
-        ]
+        self.cell_colors = CELL_COLORS
         self.point_color = "black"
 
+        # Canvas items, created with the first frame and then moved
+        self.cell_items = []
+        self.point_items = []
+        self.producer = FrameProducer(self.lloyd, every=every)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
     def is_boundary_within_canvas(self, boundary):
         min_x, min_y = (
             min(boundary, key=lambda x: x[0])[0],
@@ -69,23 +73,52 @@ class Animation:
     def clear_canvas(self):
         self.canvas.delete("points")
         self.canvas.delete("voronoi")
-
-    def draw_voronoi_cells(self):
-        for i, (_, p) in enumerate(self.lloyd.polygon_list):
-            polygon_coords = Point.points_to_coords(p.vertices)
-            self.canvas.create_polygon(
-                polygon_coords,
-                fill=self.cell_colors[i % len(self.cell_colors)],
-                outline="black",
-                tags="voronoi",
-            )
-
-    def draw_prototypes(self):
-        for point in self.lloyd.prototypes:
-            x, y = point.x, point.y
-            self.canvas.create_oval(
-                x - 3, y - 3, x + 3, y + 3, fill=self.point_color, tags="points"
-            )
+        self.canvas.delete("rings")
+        self.cell_items = []
+        self.point_items = []
+
+    def draw_voronoi_cells(self, cells):
+        if len(self.cell_items) != len(cells):
+            self.canvas.delete("voronoi")
+            self.cell_items = [
+                self.canvas.create_polygon(
+                    cells.polygon_coords(i).ravel().tolist(),
+                    fill=self.cell_colors[i % len(self.cell_colors)],
+                    outline="black",
+                    tags="voronoi",
+                )
+                for i in range(len(cells))
+            ]
+        else:
+            for i, item in enumerate(self.cell_items):
+                self.canvas.coords(item, cells.polygon_coords(i).ravel().tolist())
+        self.draw_extra_rings(cells)
+
+    def draw_extra_rings(self, cells):
+        # Canvas polygons have no holes: holes of the cells are painted over
+        # in the background color, and further parts are drawn on their own
+        self.canvas.delete("rings")
+        for i in range(len(cells)):
+            color = self.cell_colors[i % len(self.cell_colors)]
+            for ring, is_hole in cell_rings(cells, i)[1:]:
+                self.canvas.create_polygon(
+                    ring.ravel().tolist(),
+                    fill="white" if is_hole else color,
+                    outline="black",
+                    tags="rings",
+                )
+
+    def draw_prototypes(self, prototypes):
+        boxes = np.hstack((prototypes - 3, prototypes + 3)).tolist()
+        if len(self.point_items) != len(boxes):
+            self.canvas.delete("points")
+            self.point_items = [
+                self.canvas.create_oval(*box, fill=self.point_color, tags="points")
+                for box in boxes
+            ]
+            return
+        for item, box in zip(self.point_items, boxes):
+            self.canvas.coords(item, *box)
 
     def draw_enclosing_rectangle(self):
         self.canvas.create_rectangle(
@@ -94,16 +127,35 @@ class Animation:
             self.boundary[2][0],
             self.boundary[2][1],
             outline="green",
+            tags="boundary",
         )
 
-    def update(self):
-        d_omega = self.lloyd.distortion
-        self.clear_canvas()
-        self.draw_voronoi_cells()
-        self.draw_prototypes()
-        self.draw_enclosing_rectangle()
+    def latest_frame(self):
+        # Skip the frames published since the last tick, if any
+        frame = None
+        while True:
+            try:
+                pending = self.producer.frames.get_nowait()
+            except queue.Empty:
+                return frame
+            if pending is not None:
+                frame = pending
 
-        self.label.config(text=f"d_omega = {d_omega:.2f}")
-        self.lloyd.single_iteration()  # Perform single Lloyd Algorithm iteration
+    def update(self):
+        if self.producer.ident is None:
+            self.producer.start()
+            self.draw_enclosing_rectangle()
+
+        frame = self.latest_frame()
+        if frame is not None:
+            self.draw_voronoi_cells(frame.cells)
+            self.draw_prototypes(frame.prototypes)
+            self.canvas.tag_raise("boundary")
+            self.canvas.tag_raise("points")
+            self.label.config(text=f"d_omega = {frame.distortion:.2f}")
 
         self.root.after(50, self.update)
+
+    def close(self):
+        self.producer.stop()
+        self.root.destroy()
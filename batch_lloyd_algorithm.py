@@ -0,0 +1,100 @@
+import numpy as np
+from scipy.spatial import Voronoi
+
+from extended_voronoi import ExtendedVoronoi, VoronoiRegions
+from geometry_tools import Polygon
+from initializers import UniformInitializer
+
+
+class BatchContinuousLloydAlgorithm:
+    """num_instances independent continuous Lloyd runs on the same boundary,
+    advanced together.
+
+    Prototypes are stored as a (K, N, 2) array. Every iteration places the
+    active instances side by side, far enough apart that no instance
+    influences the cells of another inside its own boundary. One Voronoi
+    diagram and one clipping pass then serve all of them. An instance
+    retires once its distortion changes by less than tolerance.
+    """
+
+    def __init__(
+        self,
+        boundary,
+        num_points,
+        num_instances,
+        tolerance=0.001,
+        backend="auto",
+        initializer=None,
+        rng=None,
+    ):
+        self.boundary = np.array(boundary)
+        self.boundary_polygon = Polygon(self.boundary)
+        self.num_points = num_points
+        self.num_instances = num_instances
+        self.tolerance = tolerance
+        self.backend = backend
+        self.initializer = initializer or UniformInitializer()
+        self.rng = np.random.default_rng(rng)
+
+        # Translation of each instance on a square grid of boundary copies
+        self.diameter = np.linalg.norm(np.ptp(self.boundary, axis=0))
+        columns = int(np.ceil(np.sqrt(num_instances)))
+        grid = np.divmod(np.arange(num_instances), columns)
+        self.translations = 3 * self.diameter * np.column_stack(grid[::-1])
+
+        self.prototype_coords = self.generate_random_points()
+        self.iterations = np.zeros(num_instances, dtype=np.intp)
+        self.active = np.ones(num_instances, dtype=bool)
+        self.cell_instances = np.arange(num_instances)
+        self.cells = self.voronoi_partition(self.cell_instances)
+        self.distortion = self.calculate_distortion(self.cell_instances)
+
+    def generate_random_points(self):
+        return np.array(
+            [
+                self.initializer(self.boundary_polygon, self.num_points, self.rng)
+                for _ in range(self.num_instances)
+            ],
+            dtype=np.float64,
+        ).reshape(self.num_instances, self.num_points, 2)
+
+    def voronoi_partition(self, instances):
+        # Cells of the given instances, in (instance, prototype) order
+        shift = np.repeat(self.translations[instances], self.num_points, axis=0)
+        coords = self.prototype_coords[instances].reshape(-1, 2) + shift
+
+        vor = Voronoi(coords)
+        regions = VoronoiRegions(vor).polygons(
+            coords, vor.vertices, 3 * self.diameter * np.sqrt(2 * len(instances))
+        )
+        regions.vertices -= shift[regions.owners()]
+        return ExtendedVoronoi.clip(regions, self.boundary_polygon, self.backend)
+
+    def calculate_distortion(self, instances):
+        points = self.prototype_coords[instances].reshape(-1, 2)
+        moments = self.cells.second_moments(points).reshape(len(instances), -1)
+        areas = self.cells.areas().reshape(len(instances), -1)
+        return moments.sum(axis=1) / areas.sum(axis=1)
+
+    def single_iteration(self):
+        centroids = self.cells.centroids().reshape(-1, self.num_points, 2)
+        keep = self.active[self.cell_instances]
+        instances = self.cell_instances[keep]
+        if len(instances) == 0:
+            return
+
+        self.prototype_coords[instances] = centroids[keep]
+        self.iterations[instances] += 1
+        self.cell_instances = instances
+        self.cells = self.voronoi_partition(instances)
+
+        distortion = self.calculate_distortion(instances)
+        converged = np.abs(self.distortion[instances] - distortion) < self.tolerance
+        self.distortion[instances] = distortion
+        self.active[instances[converged | ~np.isfinite(distortion)]] = False
+
+    def run_simulation(self, num_iterations=None):
+        while self.active.any():
+            if num_iterations and self.iterations.max() >= num_iterations:
+                break
+            self.single_iteration()
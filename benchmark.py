@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from extended_voronoi import ExtendedVoronoi
+from geometry_tools import Point, Triangle
+from lloyd_algorithm import ContinuousLloydAlgorithm
+
+BOUNDARY = [[100, 100], [700, 100], [700, 400], [100, 400]]
+SIZES = (10, 100, 1000, 10000)
+
+
+def time_call(func, repeats, setup=None):
+    """Best and median wall-clock seconds of repeats calls of func. With a
+    setup function, every call is func(setup()), and setup is not timed."""
+    timings = []
+    for _ in range(repeats):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), float(np.median(timings))
+
+
+def bench_average_square_distance(size, seed, repeats):
+    # size queries against one triangle, through the geometry_tools shim
+    rng = np.random.default_rng(seed)
+    triangle = Triangle(Point.coords_to_points(rng.uniform(0, 100, (3, 2))))
+    points = Point.coords_to_points(rng.uniform(0, 100, (size, 2)))
+    return time_call(
+        lambda: [triangle.average_square_distance(p) for p in points], repeats
+    )
+
+
+def bench_region_split(size, seed, repeats):
+    lloyd = ContinuousLloydAlgorithm(BOUNDARY, size, rng=seed)
+    diameter = np.linalg.norm(np.ptp(lloyd.boundary, axis=0))
+    return time_call(
+        lambda: ExtendedVoronoi.region_split(
+            lloyd.boundary_polygon, lloyd.prototype_coords, diameter
+        ),
+        repeats,
+    )
+
+
+def bench_single_iteration(size, seed, repeats):
+    # The same first iteration every time, from a fresh seeded state
+    return time_call(
+        ContinuousLloydAlgorithm.single_iteration,
+        repeats,
+        lambda: ContinuousLloydAlgorithm(BOUNDARY, size, rng=seed),
+    )
+
+
+def bench_convergence(size, seed, repeats, max_iterations=50):
+    results = []
+
+    def run():
+        lloyd = ContinuousLloydAlgorithm(BOUNDARY, size, rng=seed)
+        results.append(lloyd.run_simulation(max_iterations, rtol=1e-6))
+
+    best, median = time_call(run, repeats)
+    return (
+        best,
+        median,
+        {
+            "iterations": results[-1].iterations,
+            "stop_reason": results[-1].stop_reason,
+            "distortion": results[-1].distortion,
+        },
+    )
+
+
+BENCHMARKS = {
+    "triangle_average_square_distance": bench_average_square_distance,
+    "region_split": bench_region_split,
+    "single_iteration": bench_single_iteration,
+    "convergence": bench_convergence,
+}
+
+
+def git_revision():
+    try:
+        # Revision of the benchmarked code, wherever it is run from
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, sizes=SIZES, seed=0, repeats=3, verbose=False):
+    """Time every benchmark of names (all by default) for every number of
+    prototypes in sizes. Runs above 1000 prototypes are repeated once.
+
+    Returns a JSON-serializable report with one record per (name, size).
+    """
+    records = []
+    for name in names or BENCHMARKS:
+        for size in sizes:
+            best, median, *extra = BENCHMARKS[name](
+                size, seed, repeats if size <= 1000 else 1
+            )
+            record = {"name": name, "size": size, "best": best, "median": median}
+            if extra:
+                record.update(extra[0])
+            records.append(record)
+            if verbose:
+                print(f"{name} N={size}: {best:.4f}s", file=sys.stderr)
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "seed": seed,
+        "results": records,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the Lloyd algorithm kernels")
+    parser.add_argument("names", nargs="*", help=", ".join(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("-o", "--output", help="JSON file, standard output if unset")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(
+        args.names, args.sizes, args.seed, args.repeats, verbose=True
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Command-line entry point for batch runs:
+
+    python -m distortion_minimization run -n 100 --boundary shape.json
+    python -m distortion_minimization study --range 3:15 --tests 100
+    python -m distortion_minimization bench single_iteration --sizes 1000
+
+Each subcommand imports only the modules it needs when it runs, so that
+headless jobs never load matplotlib or tkinter.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_BOUNDARY = [[100, 100], [700, 100], [700, 400], [100, 400]]
+BACKENDS = ("auto", "clip", "shapely", "vectorized")
+UPDATE_RULES = ("lloyd", "over-relaxed", "anderson")
+INITIALIZERS = ("uniform", "sobol", "halton", "kmeans++")
+
+
+def load_boundary(path):
+    """Boundary from a file: WKT for a .wkt file, JSON otherwise, either a
+    list of [x, y] vertices or {"exterior": [...], "holes": [[...], ...]}.
+    The default rectangle if path is None."""
+    if path is None:
+        return DEFAULT_BOUNDARY
+    with open(path) as file:
+        if path.endswith(".wkt"):
+            import shapely
+
+            return shapely.from_wkt(file.read())
+        boundary = json.load(file)
+    if isinstance(boundary, dict):
+        import shapely
+
+        return shapely.Polygon(boundary["exterior"], boundary.get("holes"))
+    return boundary
+
+
+def prototype_range(text) -> range:
+    # "N" or "START:STOP[:STEP]", STOP excluded as for range
+    try:
+        bounds = [int(value) for value in text.split(":")]
+    except ValueError:
+        bounds = []
+    if len(bounds) == 1:
+        return range(bounds[0], bounds[0] + 1)
+    if len(bounds) not in (2, 3):
+        raise argparse.ArgumentTypeError(f"invalid prototype range '{text}'")
+    return range(*bounds)
+
+
+def make_initializer(name):
+    from initializers import (
+        KMeansPlusPlusInitializer,
+        LowDiscrepancyInitializer,
+        UniformInitializer,
+    )
+
+    if name == "kmeans++":
+        return KMeansPlusPlusInitializer()
+    if name in ("sobol", "halton"):
+        return LowDiscrepancyInitializer(name)
+    return UniformInitializer()
+
+
+def make_update_rule(name):
+    from update_rules import AndersonUpdate, LloydUpdate, OverRelaxedUpdate
+
+    return {
+        "lloyd": LloydUpdate,
+        "over-relaxed": OverRelaxedUpdate,
+        "anderson": AndersonUpdate,
+    }[name]()
+
+
+def write_json(data, path):
+    # To path, or to standard output if unset
+    if path:
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2)
+    else:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+def run_command(args, extra):
+    from lloyd_algorithm import ContinuousLloydAlgorithm
+
+    lloyd = ContinuousLloydAlgorithm(
+        load_boundary(args.boundary),
+        args.num_prototypes,
+        args.backend,
+        update_rule=make_update_rule(args.update_rule),
+        incremental=args.incremental,
+        initializer=make_initializer(args.initializer),
+        rng=args.seed,
+    )
+    criteria = dict(
+        num_iterations=args.iterations,
+        atol=args.atol,
+        rtol=args.rtol,
+        max_displacement=args.max_displacement,
+        time_budget=args.time_budget,
+    )
+    if args.resume:
+        result = lloyd.resume_simulation(args.checkpoint, **criteria)
+    else:
+        result = lloyd.run_simulation(
+            checkpoint_path=args.checkpoint,
+            checkpoint_every=args.checkpoint_every,
+            **criteria,
+        )
+    write_json(
+        {
+            "num_prototypes": args.num_prototypes,
+            "seed": args.seed,
+            "distortion": result.distortion,
+            "iterations": result.iterations,
+            "stop_reason": result.stop_reason,
+            "distortion_history": result.distortion_history,
+            "prototypes": result.prototypes.tolist(),
+        },
+        args.output,
+    )
+
+
+def study_command(args, extra):
+    from result_store import ResultStore
+    from study import run_study
+
+    prototypes = [n for values in args.range for n in values]
+    if args.overwrite and os.path.exists(args.store):
+        os.remove(args.store)
+    store = run_study(
+        load_boundary(args.boundary),
+        prototypes,
+        args.tests,
+        seed=args.seed,
+        workers=args.workers,
+        initializer=make_initializer(args.initializer),
+        store=ResultStore(args.store),
+        atol=args.atol,
+        rtol=args.rtol,
+        backend=args.backend,
+    )
+    for num_prototypes in dict.fromkeys(prototypes):
+        records = store.select(num_prototypes, passed=False)
+        passed = store.select(num_prototypes)
+        print(
+            f"{num_prototypes} prototypes: {len(passed)}/{len(records)} passed, "
+            f"best distortion {passed['distortion'].min(initial=float('inf')):.4f}, "
+            f"{records['runtime'].sum():.2f} s",
+            file=sys.stderr,
+        )
+    if args.plot:
+        from study import plot_store
+
+        os.makedirs(args.plot, exist_ok=True)
+        plot_store(store, args.interval, args.tests, args.plot)
+
+
+def bench_command(args, bench_args):
+    import benchmark
+
+    benchmark.main(bench_args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="distortion_minimization",
+        description="Lloyd algorithm runs, studies and benchmarks",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    shared = argparse.ArgumentParser(add_help=False)
+    shared.add_argument(
+        "--boundary", help="JSON or WKT boundary file, a rectangle if unset"
+    )
+    shared.add_argument("--seed", type=int, default=0)
+    shared.add_argument("--backend", choices=BACKENDS, default="auto")
+    shared.add_argument("--initializer", choices=INITIALIZERS, default="uniform")
+    shared.add_argument("--rtol", type=float)
+
+    run = commands.add_parser(
+        "run", parents=[shared], help="a single simulation, as JSON"
+    )
+    run.add_argument("-n", "--num-prototypes", type=int, required=True)
+    run.add_argument("--update-rule", choices=UPDATE_RULES, default="lloyd")
+    run.add_argument("--incremental", action="store_true")
+    run.add_argument("--iterations", type=int)
+    run.add_argument("--atol", type=float)
+    run.add_argument("--max-displacement", type=float)
+    run.add_argument("--time-budget", type=float, help="seconds")
+    run.add_argument("--checkpoint", help="checkpoint file, saved during the run")
+    run.add_argument("--checkpoint-every", type=int, default=10)
+    run.add_argument("--resume", action="store_true", help="continue from --checkpoint")
+    run.add_argument("-o", "--output", help="JSON file, standard output if unset")
+    run.set_defaults(handler=run_command)
+
+    study = commands.add_parser(
+        "study", parents=[shared], help="seeded trials over numbers of prototypes"
+    )
+    study.add_argument(
+        "--range",
+        type=prototype_range,
+        nargs="+",
+        default=[range(3, 15)],
+        help="N or START:STOP[:STEP], STOP excluded",
+    )
+    study.add_argument("--tests", type=int, default=100)
+    study.add_argument("--workers", type=int, help="all cores if unset")
+    study.add_argument("--atol", type=float, default=0.001)
+    study.add_argument("--store", default="results.bin", help="result store path")
+    existing = study.add_mutually_exclusive_group()
+    existing.add_argument(
+        "--append", action="store_true", help="add to an existing store"
+    )
+    existing.add_argument(
+        "--overwrite", action="store_true", help="replace an existing store"
+    )
+    study.add_argument("--plot", metavar="DIRECTORY", help="write histograms there")
+    study.add_argument("--interval", type=float, default=2)
+    study.set_defaults(handler=study_command)
+
+    # Every argument of bench goes to benchmark.main, --help included
+    bench = commands.add_parser(
+        "bench", help="kernel timings, see benchmark.py", add_help=False
+    )
+    bench.set_defaults(handler=bench_command)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.command == "run" and args.resume and args.checkpoint is None:
+        parser.error("--resume needs the --checkpoint file to resume from")
+    if (
+        args.command == "study"
+        and os.path.exists(args.store)
+        and not (args.append or args.overwrite)
+    ):
+        parser.error(
+            f"result store {args.store} already exists, " "pass --append or --overwrite"
+        )
+    args.handler(args, extra)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,43 @@
-from collections import defaultdict
-
 import numpy as np
-from scipy.spatial import Voronoi
+import shapely
+from scipy.spatial import Delaunay, Voronoi
 
 from geometry_tools import Point, Polygon
+from instrumentation import NO_PHASE, Instrumentation
+from packed_polygons import PackedPolygons
 
 
-class ExtendedVoronoi:
-    def voronoi_polygons(voronoi, diameter: float):
-        """Generate shapely.geometry.Polygon objects corresponding to the
-        regions of a scipy.spatial.Voronoi object, in the order of the
-        input points. The polygons for the infinite regions are large
-        enough that all points within a distance 'diameter' of a Voronoi
-        vertex are contained in one of the infinite polygons.
+class VoronoiRegions:
+    """Index structure of the regions of a scipy.spatial.Voronoi object, in
+    the order of the input points, from which the polygons of
+    ExtendedVoronoi.voronoi_polygons are built as one PackedPolygons.
 
-        """
-        centroid = voronoi.points.mean(axis=0)
-
-        # Mapping from (input point index, Voronoi point index) to list of
-        # unit vectors in the directions of the infinite ridges starting
-        # at the Voronoi point and neighbouring the input point.
-        ridge_direction = defaultdict(list)
-        for (p, q), rv in zip(voronoi.ridge_points, voronoi.ridge_vertices):
-            u, v = sorted(rv)
-            if u == -1:
-                # Infinite ridge starting at ridge point with index v,
-                # equidistant from input points with indexes p and q.
-                t = voronoi.points[q] - voronoi.points[p]  # tangent
-                n = np.array([-t[1], t[0]]) / np.linalg.norm(t)  # normal
-                midpoint = voronoi.points[[p, q]].mean(axis=0)
-                direction = np.sign(np.dot(midpoint - centroid, n)) * n
-                ridge_direction[p, v].append(direction)
-                ridge_direction[q, v].append(direction)
+    Each region is a list of indices into the Voronoi vertices followed,
+    for infinite regions, by two extra vertices placed along the infinite
+    ridges that bound it.
+    """
+
+    def __init__(self, voronoi):
+        self.num_vertices = len(voronoi.vertices)
 
+        # Infinite ridges, as (input point p, input point q, Voronoi vertex v)
+        infinite = [
+            (p, q, max(rv))
+            for (p, q), rv in zip(voronoi.ridge_points, voronoi.ridge_vertices)
+            if -1 in rv
+        ]
+        self.ridge_points = np.array([(p, q) for p, q, _ in infinite], dtype=np.intp)
+        ridge_index = {}
+        for r, (p, q, v) in enumerate(infinite):
+            ridge_index.setdefault((p, v), []).append(r)
+            ridge_index.setdefault((q, v), []).append(r)
+
+        regions, ends, ridges = [], [], []
         for i, r in enumerate(voronoi.point_region):
             region = voronoi.regions[r]
             if -1 not in region:
                 # Finite region.
-                yield Polygon(voronoi.vertices[region])
+                regions.append(region)
                 continue
             # Infinite region.
             inf = region.index(-1)  # Index of vertex at infinity.
@@ -45,39 +45,486 @@ class ExtendedVoronoi:
             k = region[(inf + 1) % len(region)]  # Index of next vertex.
             if j == k:
                 # Region has one Voronoi vertex with two ridges.
-                dir_j, dir_k = ridge_direction[i, j]
+                ridge_j, ridge_k = ridge_index[i, j]
             else:
                 # Region has two Voronoi vertices, each with one ridge.
-                (dir_j,) = ridge_direction[i, j]
-                (dir_k,) = ridge_direction[i, k]
+                (ridge_j,) = ridge_index[i, j]
+                (ridge_k,) = ridge_index[i, k]
+            extra = self.num_vertices + 2 * len(ends)
+            regions.append(region[inf + 1 :] + region[:inf] + [extra, extra + 1])
+            ends.append((j, k))
+            ridges.append((ridge_j, ridge_k))
+
+        self.index = np.fromiter(
+            (v for region in regions for v in region),
+            dtype=np.intp,
+            count=sum(len(region) for region in regions),
+        )
+        self.offsets = np.zeros(len(regions) + 1, dtype=np.intp)
+        self.offsets[1:] = np.cumsum([len(region) for region in regions])
+        self.ends = np.array(ends, dtype=np.intp).reshape(-1, 2)
+        self.ridges = np.array(ridges, dtype=np.intp).reshape(-1, 2)
+
+    def polygons(self, points, vertices, diameter: float) -> PackedPolygons:
+        """Region polygons for the given input points and Voronoi vertices.
+        The infinite regions are cut far enough that every point within a
+        distance 'diameter' of an input point lies in the polygon of its
+        region, however far the Voronoi vertices are from the points.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+
+        # Unit vectors in the directions of the infinite ridges, pointing
+        # away from the centroid of the input points.
+        p, q = self.ridge_points.T
+        t = points[q] - points[p]  # tangent
+        n = np.column_stack((-t[:, 1], t[:, 0]))
+        n /= np.linalg.norm(n, axis=1)[:, None]  # normal
+        midpoint = (points[p] + points[q]) / 2
+        side = np.einsum("ij,ij->i", midpoint - points.mean(axis=0), n)
+        direction = np.sign(side)[:, None] * n
+
+        # The extra edge of an infinite region is cut across the bisector u
+        # of its two ridges, beyond its finite vertices (the farthest of
+        # which is one of the ridge ends) and beyond every point within
+        # 'diameter' of the input points, with a margin of 'diameter'.
+        dir_j, dir_k = direction[self.ridges[:, 0]], direction[self.ridges[:, 1]]
+        cos_half = np.linalg.norm(dir_j + dir_k, axis=1) / 2
+        u = (dir_j + dir_k) / (2 * cos_half[:, None])
+        end_j, end_k = vertices[self.ends[:, 0]], vertices[self.ends[:, 1]]
+        reach_j = np.einsum("ij,ij->i", end_j, u)
+        reach_k = np.einsum("ij,ij->i", end_k, u)
+        center = points.mean(axis=0)
+        radius = np.sqrt(np.max(np.sum((points - center) ** 2, axis=1), initial=0))
+        cut = np.maximum(
+            np.maximum(reach_j, reach_k), u @ center + radius + 2 * diameter
+        )
+        extra = np.empty((2 * len(self.ends), 2))
+        extra[0::2] = end_j + dir_j * ((cut - reach_j) / cos_half)[:, None]
+        extra[1::2] = end_k + dir_k * ((cut - reach_k) / cos_half)[:, None]
+
+        table = np.concatenate((vertices[: self.num_vertices], extra))
+        return PackedPolygons(table[self.index], self.offsets)
+
+
+class IncrementalVoronoi:
+    """Voronoi regions of a moving set of points, warm-started from the
+    Delaunay triangulation of the previous call.
+
+    Four fixed sentinel points, far outside the area within 'diameter' of
+    the points, close the triangulation: they keep its hull constant and
+    make every region finite, without changing the regions within that
+    area. When the points move, the previous triangulation is kept if all
+    its triangles are still counter-clockwise; edges that are no longer
+    locally Delaunay are then repaired by Lawson flips, which only touch
+    the triangles around them. Otherwise, or if more than
+    max_flip_fraction of the edges need a flip, the triangulation is
+    rebuilt with Qhull.
+    """
+
+    def __init__(self, center=None, max_flip_fraction=0.05):
+        self.center = center
+        self.max_flip_fraction = max_flip_fraction
+        self.sentinels = None
+        self.num_points = None
+        self.simplices = None
+        self.neighbors = None
+        self.rebuilds = 0
+        self.flips = 0
+
+    def get_state(self) -> dict:
+        if self.simplices is None:
+            return {}
+        return {
+            "sentinels": self.sentinels,
+            "num_points": self.num_points,
+            "simplices": self.simplices,
+            "neighbors": self.neighbors,
+            "counts": np.array([self.rebuilds, self.flips]),
+        }
+
+    def set_state(self, state):
+        if not state:
+            return
+        self.sentinels = np.array(state["sentinels"])
+        self.num_points = int(state["num_points"])
+        self.simplices = np.array(state["simplices"], dtype=np.intp)
+        self.neighbors = np.array(state["neighbors"], dtype=np.intp)
+        self.rebuilds, self.flips = (int(count) for count in state["counts"])
+
+    @staticmethod
+    def _orientations(points, simplices):
+        a, b, c = (points[simplices[:, k]] for k in range(3))
+        ab, ac = b - a, c - a
+        return ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]
+
+    def _rebuild(self, points):
+        triangulation = Delaunay(points)
+        simplices = triangulation.simplices.astype(np.intp)
+        neighbors = triangulation.neighbors.astype(np.intp)
+        clockwise = self._orientations(points, simplices) < 0
+        simplices[clockwise] = simplices[clockwise][:, [0, 2, 1]]
+        neighbors[clockwise] = neighbors[clockwise][:, [0, 2, 1]]
+        self.simplices, self.neighbors = simplices, neighbors
+        self.rebuilds += 1
+
+    @staticmethod
+    def _incircle(a, b, c, d):
+        """Positive when d lies inside the circumcircle of the
+        counter-clockwise triangle abc, with the determinant's permanent
+        as a scale for rounding errors."""
+        ad, bd, cd = a - d, b - d, c - d
+        a2, b2, c2 = (np.einsum("...i,...i->...", v, v) for v in (ad, bd, cd))
+        ab = ad[..., 0] * bd[..., 1] - bd[..., 0] * ad[..., 1]
+        bc = bd[..., 0] * cd[..., 1] - cd[..., 0] * bd[..., 1]
+        ca = cd[..., 0] * ad[..., 1] - ad[..., 0] * cd[..., 1]
+        permanent = (
+            a2 * (np.abs(bd[..., 0] * cd[..., 1]) + np.abs(cd[..., 0] * bd[..., 1]))
+            + b2 * (np.abs(cd[..., 0] * ad[..., 1]) + np.abs(ad[..., 0] * cd[..., 1]))
+            + c2 * (np.abs(ad[..., 0] * bd[..., 1]) + np.abs(bd[..., 0] * ad[..., 1]))
+        )
+        return a2 * bc + b2 * ca + c2 * ab, permanent
+
+    def _is_illegal(self, points, t, i) -> bool:
+        u = self.neighbors[t, i]
+        if u == -1:
+            return False
+        j = int(np.flatnonzero(self.neighbors[u] == t)[0])
+        a, b, c = points[self.simplices[t, [i, (i + 1) % 3, (i + 2) % 3]]]
+        det, permanent = self._incircle(a, b, c, points[self.simplices[u, j]])
+        return det > 1e-12 * permanent
+
+    def _flip(self, t, i):
+        # Flip the edge b-c shared by t = (a, b, c) and u = (d, c, b)
+        s, nb = self.simplices, self.neighbors
+        u = nb[t, i]
+        j = int(np.flatnonzero(nb[u] == t)[0])
+        a, b, c = s[t, i], s[t, (i + 1) % 3], s[t, (i + 2) % 3]
+        d = s[u, j]
+        n_ca, n_ab = nb[t, (i + 1) % 3], nb[t, (i + 2) % 3]
+        n_bd, n_dc = nb[u, (j + 1) % 3], nb[u, (j + 2) % 3]
+
+        s[t], nb[t] = (a, b, d), (n_bd, u, n_ab)
+        s[u], nb[u] = (a, d, c), (n_dc, n_ca, t)
+        if n_bd != -1:
+            nb[n_bd][nb[n_bd] == u] = t
+        if n_ca != -1:
+            nb[n_ca][nb[n_ca] == t] = u
+        return (t, 0), (t, 2), (u, 0), (u, 1)
+
+    def _repair(self, points) -> bool:
+        if np.any(self._orientations(points, self.simplices) <= 0):
+            return False
+
+        # Interior edges (t, i), each seen from its lower-numbered triangle
+        t, i = np.nonzero(self.neighbors > np.arange(len(self.neighbors))[:, None])
+        u = self.neighbors[t, i]
+        j = np.argmax(self.neighbors[u] == t[:, None], axis=1)
+        det, permanent = self._incircle(
+            points[self.simplices[t, i]],
+            points[self.simplices[t, (i + 1) % 3]],
+            points[self.simplices[t, (i + 2) % 3]],
+            points[self.simplices[u, j]],
+        )
+        illegal = det > 1e-12 * permanent
+        max_flips = self.max_flip_fraction * len(t)
+        if illegal.sum() > max_flips:
+            return False
+
+        stack = list(zip(t[illegal].tolist(), i[illegal].tolist()))
+        flips = 0
+        while stack:
+            edge = stack.pop()
+            if not self._is_illegal(points, *edge):
+                continue
+            stack.extend(self._flip(*edge))
+            flips += 1
+            if flips > max_flips:
+                return False
+        self.flips += flips
+        return True
+
+    def update(self, points, diameter: float):
+        """Bring the triangulation up to date with points (without the
+        sentinels); returns the points followed by the sentinels."""
+        points = np.asarray(points, dtype=np.float64)
+        if self.sentinels is None:
+            center = points.mean(axis=0) if self.center is None else self.center
+            corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]])
+            self.sentinels = np.asarray(center) + 4 * diameter * corners
+        all_points = np.concatenate((points, self.sentinels))
+        if (
+            self.simplices is None
+            or self.num_points != len(points)
+            or not self._repair(all_points)
+        ):
+            self._rebuild(all_points)
+            self.num_points = len(points)
+        return all_points
+
+    def circumcenters(self, points):
+        # Triangles rotated to start at their smallest index, so that the
+        # result only depends on the triangle and not on its numbering
+        shift = np.argmin(self.simplices, axis=1)
+        order = (shift[:, None] + np.arange(3)) % 3
+        a, b, c = (
+            points[np.take_along_axis(self.simplices, order, axis=1)[:, k]]
+            for k in range(3)
+        )
+        ab, ac = b - a, c - a
+        ab2, ac2 = np.einsum("ij,ij->i", ab, ab), np.einsum("ij,ij->i", ac, ac)
+        d = 2 * (ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0])
+        return a + np.column_stack(
+            (
+                (ac[:, 1] * ab2 - ab[:, 1] * ac2) / d,
+                (ab[:, 0] * ac2 - ac[:, 0] * ab2) / d,
+            )
+        )
+
+    def polygons(self, points, diameter: float) -> PackedPolygons:
+        """Region polygons of points, in their order. Every polygon
+        contains the part of its Voronoi region that lies within a
+        distance 'diameter' of the points."""
+        num_points = len(points)
+        all_points = self.update(points, diameter)
+        vertices = self.circumcenters(all_points)
+
+        # Each region is made of the circumcenters of the triangles around
+        # its point; regions are convex, so ordering these by angle around
+        # their mean lists them along the boundary.
+        owner = self.simplices.ravel()
+        index = np.repeat(np.arange(len(vertices)), 3)
+        real = owner < num_points
+        owner, index = owner[real], index[real]
 
-            # Length of ridges needed for the extra edge to lie at least
-            # 'diameter' away from all Voronoi vertices.
-            length = 3 * diameter / np.linalg.norm(dir_j + dir_k)
+        counts = np.bincount(owner, minlength=num_points)
+        mean = (
+            np.column_stack(
+                [
+                    np.bincount(owner, vertices[index, k], minlength=num_points)
+                    for k in range(2)
+                ]
+            )
+            / counts[:, None]
+        )
+        offset = vertices[index] - mean[owner]
+        order = np.lexsort((np.arctan2(offset[:, 1], offset[:, 0]), owner))
 
-            # Polygon consists of finite part plus an extra edge.
-            finite_part = voronoi.vertices[region[inf + 1 :] + region[:inf]]
-            extra_edge = [
-                voronoi.vertices[j] + dir_j * length,
-                voronoi.vertices[k] + dir_k * length,
-            ]
-            yield Polygon(np.concatenate((finite_part, extra_edge)))
+        offsets = np.zeros(num_points + 1, dtype=np.intp)
+        offsets[1:] = np.cumsum(counts)
+        return PackedPolygons(vertices[index[order]], offsets)
+
+
+class ExtendedVoronoi:
+    def voronoi_polygons(voronoi, diameter: float):
+        """Generate Polygon objects corresponding to the regions of a
+        scipy.spatial.Voronoi object, in the order of the input points. The
+        polygons for the infinite regions are large enough that all points
+        within a distance 'diameter' of a Voronoi vertex are contained in
+        one of the infinite polygons.
+
+        """
+        for geometry in ExtendedVoronoi.voronoi_geometries(voronoi, diameter):
+            yield Polygon(geometry)
+
+    @staticmethod
+    def voronoi_geometries(voronoi, diameter: float) -> np.ndarray:
+        """Array of the Shapely polygons of voronoi_polygons, all built at
+        once by shapely.polygons."""
+        return (
+            VoronoiRegions(voronoi)
+            .polygons(voronoi.points, voronoi.vertices, diameter)
+            .to_geometries()
+        )
+
+    @staticmethod
+    def is_convex(coords) -> bool:
+        coords = np.asarray(coords, dtype=np.float64)
+        edges = np.roll(coords, -1, axis=0) - coords
+        turns = edges[:, 0] * np.roll(edges[:, 1], -1) - edges[:, 1] * np.roll(
+            edges[:, 0], -1
+        )
+        return bool(np.all(turns >= 0) or np.all(turns <= 0))
+
+    @staticmethod
+    def clip_convex(cells: PackedPolygons, boundary_coords) -> PackedPolygons:
+        """Clip every cell against a convex boundary ring in one
+        Sutherland-Hodgman pass per boundary edge."""
+        boundary_coords = np.asarray(boundary_coords, dtype=np.float64)
+        boundary = PackedPolygons(boundary_coords, [0, len(boundary_coords)])
+        if boundary.signed_areas()[0] < 0:
+            boundary_coords = boundary_coords[::-1]
+
+        for a, b in zip(boundary_coords, np.roll(boundary_coords, -1, axis=0)):
+            # Inward normal of the edge a -> b of a counter-clockwise ring
+            normal = np.array([a[1] - b[1], b[0] - a[0]])
+            vertices, nxt = cells.vertices, cells._next_index()
+            d = (vertices - a) @ normal
+            d_next = d[nxt]
+
+            # Each vertex emits itself if inside, then the crossing point of
+            # its outgoing edge if that edge crosses the boundary line.
+            inside = d >= 0
+            crossing = ((d > 0) & (d_next < 0)) | ((d < 0) & (d_next > 0))
+            count = inside.astype(np.intp) + crossing
+            start = np.cumsum(count) - count
+
+            t = d[crossing] / (d[crossing] - d_next[crossing])
+            v, w = vertices[crossing], vertices[nxt[crossing]]
+
+            out = np.empty((count.sum(), 2))
+            out[start[inside]] = vertices[inside]
+            out[start[crossing] + inside[crossing]] = v + t[:, None] * (w - v)
+
+            offsets = np.zeros(len(cells) + 1, dtype=np.intp)
+            offsets[1:] = np.cumsum(
+                np.bincount(cells.owners(), count, minlength=len(cells))
+            )
+            cells = PackedPolygons(out, offsets)
+
+        return cells
+
+    @staticmethod
+    def partition(
+        boundary_polygon: Polygon,
+        points,
+        diameter: float,
+        backend: str = "auto",
+        voronoi: IncrementalVoronoi = None,
+        instrumentation: Instrumentation = None,
+    ) -> PackedPolygons:
+        """Voronoi cells of points clipped to boundary_polygon, as one
+        PackedPolygons in the order of the points.
+
+        backend is one of:
+
+        - "clip": batched clipping of all cells at once, for convex
+          boundaries without holes only,
+        - "shapely": one vectorized shapely.intersection call over the cells
+          that cross the boundary, keeping those inside it as they are;
+          any boundary, non-convex or with holes,
+        - "vectorized": one shapely.intersection call over all the cells,
+          which keep their geometries; any boundary,
+        - "auto": "clip" for a convex boundary without holes, "shapely"
+          otherwise.
+
+        An IncrementalVoronoi passed as voronoi is updated in place of
+        building a new diagram. With an Instrumentation, the "voronoi" and
+        "clip" steps are timed as phases of their own.
+        """
+        with instrumentation.phase("voronoi") if instrumentation else NO_PHASE:
+            regions = ExtendedVoronoi.regions(points, diameter, voronoi)
+        with instrumentation.phase("clip") if instrumentation else NO_PHASE:
+            return ExtendedVoronoi.clip(regions, boundary_polygon, backend)
+
+    @staticmethod
+    def regions(
+        points, diameter: float, voronoi: IncrementalVoronoi = None
+    ) -> PackedPolygons:
+        # Unclipped, extended Voronoi regions of points, in their order
+        coords = Point.as_coord_array(points)
+        if voronoi is not None:
+            return voronoi.polygons(coords, diameter)
+        vor = Voronoi(coords)
+        return VoronoiRegions(vor).polygons(coords, vor.vertices, diameter)
 
     @staticmethod
-    def region_split(boundary_polygon: Polygon, points, diameter: float):
-        polygon_list = []
-        vor = Voronoi(Point.points_to_coords(points))
-        voronoi_polygons = ExtendedVoronoi.voronoi_polygons(vor, diameter)
+    def clip(
+        regions: PackedPolygons, boundary_polygon: Polygon, backend: str = "auto"
+    ) -> PackedPolygons:
+        boundary_coords = PackedPolygons._ring_coords(boundary_polygon)
+        if backend == "auto":
+            backend = (
+                "clip"
+                if ExtendedVoronoi.is_convex(boundary_coords)
+                and not boundary_polygon._polygon.interiors
+                else "shapely"
+            )
 
-        for p in voronoi_polygons:
-            points_in = [point for point in points if p.contains(point._point)]
+        if backend == "clip":
+            return ExtendedVoronoi.clip_convex(regions, boundary_coords)
+        if backend == "shapely":
+            return ExtendedVoronoi.clip_shapely(regions, boundary_polygon._polygon)
+        if backend == "vectorized":
+            return PackedPolygons.from_geometries(
+                shapely.intersection(regions.to_geometries(), boundary_polygon._polygon)
+            )
+        raise ValueError(f"Unknown partition backend '{backend}'")
 
-            if len(points_in) != 1:
+    @staticmethod
+    def clip_shapely(regions: PackedPolygons, boundary) -> PackedPolygons:
+        """Clip every cell against any polygonal Shapely boundary, possibly
+        non-convex and with holes, with vectorized GEOS calls. Cells lying
+        well inside the prepared boundary are kept as they are, only the
+        others are intersected with it."""
+        shapely.prepare(boundary)
+        cells = regions.to_geometries()
+        crossing = np.flatnonzero(~shapely.contains_properly(boundary, cells))
+        cells = cells.copy()
+        cells[crossing] = shapely.intersection(cells[crossing], boundary)
+
+        # Only the clipped cells are unpacked from their geometries
+        order = np.arange(len(cells))
+        order[crossing] = len(cells) + np.arange(len(crossing))
+        clipped = PackedPolygons.concatenate(
+            [regions, PackedPolygons.from_geometries(cells[crossing])]
+        ).take(order)
+        clipped.geometries = cells
+        return clipped
+
+    @staticmethod
+    def region_split(
+        boundary_polygon: Polygon, points, diameter: float, validate: bool = False
+    ):
+        """Clip the Voronoi cells of points to boundary_polygon.
+
+        points is either an (N, 2) coordinate array or a list of Point; each
+        returned pair holds the matching array row or Point and its cell.
+        Cells are matched to points through Voronoi.point_region; validate
+        re-checks that every point lies in its own cell, for debugging. The
+        cells must cover the boundary: a ValueError is raised otherwise.
+        Cells not meeting the boundary are left as empty Shapely polygons.
+        """
+        coords = Point.as_coord_array(points)
+        cells = ExtendedVoronoi.voronoi_geometries(Voronoi(coords), diameter)
+
+        if validate:
+            # Every (point, cell) pair with the point inside the cell
+            point_index, cell_index = shapely.STRtree(cells).query(
+                shapely.points(coords), predicate="within"
+            )
+            misplaced = np.bincount(
+                cell_index, cell_index != point_index, minlength=len(cells)
+            )
+            counts = np.bincount(cell_index, minlength=len(cells))
+            wrong = np.flatnonzero((counts != 1) | (misplaced > 0))
+            if len(wrong):
                 raise ValueError(
-                    "Error in splitting: Expected 1 point, found", len(points_in)
+                    "Error in splitting: Expected point",
+                    wrong[0],
+                    "found",
+                    np.sort(point_index[cell_index == wrong[0]]),
                 )
 
-            intersection = p.intersection(boundary_polygon)
-            polygon_list.append((points_in[0], intersection))
-
-        return polygon_list
+        intersections = shapely.intersection(cells, boundary_polygon._polygon)
+        # Cheap check that the cells tile the boundary, missing no part of it
+        covered = shapely.area(intersections).sum()
+        if not np.isclose(covered, boundary_polygon.area, rtol=1e-9):
+            raise ValueError(
+                "Error in splitting: cells cover",
+                covered,
+                "of the boundary area",
+                boundary_polygon.area,
+            )
+        return [
+            (
+                points[i],
+                (
+                    Polygon(intersection)
+                    if isinstance(intersection, shapely.Polygon)
+                    and not intersection.is_empty
+                    else intersection
+                ),
+            )
+            for i, intersection in enumerate(intersections)
+        ]
@@ -1,11 +1,14 @@
 import random
 from collections.abc import Iterable
+from functools import cached_property
 
 import numpy as np
+import shapely
 from shapely.geometry import LineString
 from shapely.geometry import Point as ShapelyPoint
 from shapely.geometry import Polygon as ShapelyPolygon
-from skspatial.objects import Line as ln
+
+from lean_geometry import LeanLine, LeanPoint, LeanPolygon, LeanTriangle
 
 """
 The shapely.geometry.Point from the Shapely library doesn't directly support adding custom methods
@@ -108,13 +111,25 @@ class Point:
     def __str__(self):
         return str(self._point)
 
-    @pw.input_wrapper
-    def __eq__(self, other):
-        return self.equals(other)
+    @property
+    def x(self) -> float:
+        return self._point.x
+
+    @property
+    def y(self) -> float:
+        return self._point.y
+
+    @property
+    def lean(self) -> LeanPoint:
+        return LeanPoint(self._point.x, self._point.y)
+
+    def distance(self, other) -> float:
+        return self.lean.distance(LeanPoint(other.x, other.y))
 
-    @pw.input_wrapper
-    def __ne__(self, other):
-        return not self.__eq__(other)
+    def __eq__(self, other):
+        if not isinstance(other, (Point, ShapelyPoint)):
+            return NotImplemented
+        return self._point.x == other.x and self._point.y == other.y
 
     @pw.output_wrapper
     def closest_point(self, point_list: list) -> "Point":
@@ -134,12 +149,21 @@ class Point:
             coords.append((point.x, point.y))
         return coords
 
+    @staticmethod
+    def as_coord_array(points) -> np.ndarray:
+        # (N, 2) float64 array from coordinates or from a list of Point
+        if len(points) and isinstance(points[0], Point):
+            points = Point.points_to_coords(points)
+        return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
 
 class Line:
     def __init__(self, start, end):
         if start == end:
             raise ValueError("To define a Line, points must be different")
         self._line: LineString = pw.input_wrapper(LineString)([start, end])
+        p1, p2 = self._line.coords
+        self.lean = LeanLine(LeanPoint(*p1), LeanPoint(*p2))
         self._attribute_cache = {}  # Cache to store accessed attributes
 
     def __getattr__(self, attr):
@@ -159,19 +183,13 @@ class Line:
     def __str__(self):
         return str(self._line)
 
-    @pw.input_wrapper
     def get_projection_coordinate(self, point) -> "Point":
-        p1, p2 = self._line.coords
-        x, y = ln(
-            point=[p1[0], p1[1]], direction=[p2[0] - p1[0], p2[1] - p1[1]]
-        ).project_point([point.x, point.y])
-        return Point(x, y)
+        projection = self.lean.get_projection_coordinate(LeanPoint(point.x, point.y))
+        return Point(projection.x, projection.y)
 
-    @pw.input_wrapper
     def perpendicular_line(self, point) -> "Line":
-        p1, p2 = self._line.coords
-        normal_vector = Vector(Point(*p1), Point(*p2)).normal_vector()
-        return Line(point, Point(point.x + normal_vector.x, point.y + normal_vector.y))
+        end = self.lean.perpendicular_line(LeanPoint(point.x, point.y)).end
+        return Line(Point(point.x, point.y), Point(end.x, end.y))
 
 
 class Vector(np.ndarray):
@@ -201,6 +219,21 @@ class Vector(np.ndarray):
         return Vector(self.y, -self.x)
 
 
+def sample_triangles(triangles, cumulative_areas, m, rng=None) -> np.ndarray:
+    """Draw m uniform points from the union of a (T, 3, 2) array of
+    triangles, given their cumulative areas, as an (m, 2) array."""
+    rng = np.random.default_rng(rng)
+    idx = np.searchsorted(
+        cumulative_areas, rng.random(m) * cumulative_areas[-1], side="right"
+    )
+    idx = np.minimum(idx, len(triangles) - 1)
+    r = rng.random((m, 2))
+    outside = r.sum(axis=1) > 1
+    r[outside] = 1 - r[outside]
+    a, b, c = (triangles[idx, k] for k in range(3))
+    return a + r[:, :1] * (b - a) + r[:, 1:] * (c - a)
+
+
 class Shape:
     def __init__(self, arg):
         self._create_shape(arg)
@@ -262,26 +295,64 @@ class Polygon(Shape):
             )
         return Point.coords_to_points(exterior_coords)
 
+    @cached_property
+    def _fan_triangles(self) -> tuple["Triangle", ...]:
+        return tuple(
+            Triangle([self.vertices[0], self.vertices[i], self.vertices[i + 1]])
+            for i in range(1, len(self.vertices) - 1)
+        )
+
     def divide_convex_polygon_to_triangles(self) -> list["Triangle"]:
-        triangles = []
-        for i in range(1, len(self.vertices) - 1):
-            triangles.append(
-                Triangle([self.vertices[0], self.vertices[i], self.vertices[i + 1]])
+        return list(self._fan_triangles)
+
+    @cached_property
+    def _sampling_table(self):
+        # Triangles as a (T, 3, 2) array and their cumulative areas: the fan
+        # of a convex polygon, or a constrained Delaunay triangulation
+        if self.is_convex:
+            coords = np.array(Point.points_to_coords(self.vertices))
+            triangles = np.stack(
+                (
+                    np.broadcast_to(coords[0], (len(coords) - 2, 2)),
+                    coords[1:-1],
+                    coords[2:],
+                ),
+                axis=1,
             )
-        return triangles
+        else:
+            triangles = shapely.get_coordinates(
+                shapely.get_parts(shapely.constrained_delaunay_triangles(self._polygon))
+            ).reshape(-1, 4, 2)[:, :3]
+        ab, ac = triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+        areas = np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]) / 2
+        return triangles, np.cumsum(areas)
+
+    def random_points_in_shape(self, m, rng=None) -> np.ndarray:
+        return sample_triangles(*self._sampling_table, m, rng)
+
+    @cached_property
+    def is_convex(self) -> bool:
+        return not self._polygon.interiors and self._polygon.convex_hull.area <= (
+            self._polygon.area * (1 + 1e-12)
+        )
+
+    @cached_property
+    def lean(self) -> LeanPolygon:
+        return LeanPolygon(self._polygon.exterior.coords)
+
+    @cached_property
+    def lean_holes(self) -> tuple[LeanPolygon, ...]:
+        return tuple(LeanPolygon(ring.coords) for ring in self._polygon.interiors)
 
     def random_point_in_shape(self) -> "Point":
-        triangles = self.divide_convex_polygon_to_triangles()
-        areas = [triangle.area for triangle in triangles]
-        total_area = sum(areas)
-        probabilities = [area / total_area for area in areas]
-        idx = random.choices(range(len(triangles)), weights=probabilities, k=1)[0]
-        return Triangle.random_point_in_shape(triangles[idx])
-
-    def average_square_distance(self, point: "Point"):
-        return sum(
-            triangle.average_square_distance(point)
-            for triangle in self.divide_convex_polygon_to_triangles()
+        triangles, cumulative_areas = self._sampling_table
+        idx = random.choices(range(len(triangles)), cum_weights=cumulative_areas)[0]
+        return Triangle(triangles[idx].tolist()).random_point_in_shape()
+
+    def average_square_distance(self, point: "Point") -> float:
+        point = LeanPoint(point.x, point.y)
+        return self.lean.average_square_distance(point) - sum(
+            hole.average_square_distance(point) for hole in self.lean_holes
         )
 
 
@@ -295,6 +366,14 @@ class Triangle(Shape):
             )
         return Point.coords_to_points(exterior_coords)
 
+    @cached_property
+    def lean(self) -> LeanTriangle:
+        return LeanTriangle(self._polygon.exterior.coords)
+
+    def random_points_in_shape(self, m, rng=None) -> np.ndarray:
+        triangle = np.array([Point.points_to_coords(self.vertices)])
+        return sample_triangles(triangle, np.array([self.area]), m, rng)
+
     def random_point_in_shape(self) -> "Point":
         a, b, c = self.vertices
 
@@ -309,26 +388,4 @@ class Triangle(Shape):
         return Point(*random_point)
 
     def average_square_distance(self, point: "Point") -> float:
-        a, b, c = self.vertices
-
-        h = Line(a, b).get_projection_coordinate(c)
-        g = self.centroid
-        gc = Line(h, c).get_projection_coordinate(g)
-        gy = Line(a, b).perpendicular_line(a).get_projection_coordinate(g)
-        surface = self.area
-
-        sign_ah_ab = 1 if Vector.dot_product(Vector(a, b), Vector(a, h)) > 0 else -1
-        sign_hb_ab = 1 if Vector.dot_product(Vector(a, b), Vector(h, b)) > 0 else -1
-
-        return (
-            Vector(h, c).norm
-            / 12
-            * (
-                sign_ah_ab * Vector(a, h).norm ** 3
-                + sign_hb_ab * Vector(h, b).norm ** 3
-                + Vector(a, b).norm * Vector(h, c).norm ** 2
-            )
-            + surface * Vector(a, point).norm ** 2
-            + 2 * surface * Vector.dot_product(Vector(point, a), Vector(a, g))
-            + surface * (Vector(g, gy).norm ** 2 - Vector(g, gc).norm ** 2)
-        )
+        return self.lean.average_square_distance(LeanPoint(point.x, point.y))
@@ -0,0 +1,88 @@
+import numpy as np
+import shapely
+
+
+class UniformInitializer:
+    """Independent uniform points in the boundary polygon."""
+
+    def __call__(self, polygon, num_points, rng):
+        return polygon.random_points_in_shape(num_points, rng)
+
+
+class LowDiscrepancyInitializer:
+    """Scrambled Sobol or Halton points of the polygon's bounding box,
+    keeping those inside the polygon in sequence order."""
+
+    def __init__(self, method="sobol"):
+        if method not in ("sobol", "halton"):
+            raise ValueError(f"Unknown low-discrepancy method '{method}'")
+        self.method = method
+
+    def __call__(self, polygon, num_points, rng):
+        # scipy.stats alone takes longer to import than the whole solver
+        from scipy.stats import qmc
+
+        engine = (qmc.Sobol if self.method == "sobol" else qmc.Halton)(d=2, seed=rng)
+        x_min, y_min, x_max, y_max = polygon._polygon.bounds
+        fraction = polygon.area / ((x_max - x_min) * (y_max - y_min))
+        points = np.empty((0, 2))
+        while len(points) < num_points:
+            needed = int(np.ceil((num_points - len(points)) / fraction))
+            if self.method == "sobol":
+                # A power of two at first, then as many points as drawn so
+                # far: random_base2 only starts a sequence, and doubling it
+                # keeps the balance properties of the Sobol points
+                batch = (
+                    engine.random(engine.num_generated)
+                    if engine.num_generated
+                    else engine.random_base2(int(np.ceil(np.log2(max(needed, 2)))))
+                )
+            else:
+                batch = engine.random(needed)
+            batch = qmc.scale(batch, (x_min, y_min), (x_max, y_max))
+            inside = shapely.contains_xy(polygon._polygon, batch[:, 0], batch[:, 1])
+            points = np.concatenate((points, batch[inside]))
+        return points[:num_points]
+
+
+class KMeansPlusPlusInitializer:
+    """D^2 seeding (k-means++) over uniform candidate points of the polygon:
+    each new prototype is drawn among the candidates with probability
+    proportional to the squared distance to the nearest prototype so far.
+
+    Costs O(num_points * num_candidates); num_candidates defaults to
+    candidates_per_point * num_points.
+    """
+
+    def __init__(self, num_candidates=None, candidates_per_point=10):
+        self.num_candidates = num_candidates
+        self.candidates_per_point = candidates_per_point
+
+    def __call__(self, polygon, num_points, rng):
+        rng = np.random.default_rng(rng)
+        num_candidates = self.num_candidates or max(
+            self.candidates_per_point * num_points, num_points
+        )
+        candidates = polygon.random_points_in_shape(num_candidates, rng)
+
+        chosen = np.empty(num_points, dtype=np.intp)
+        chosen[0] = rng.integers(num_candidates)
+        squared_distances = np.sum((candidates - candidates[chosen[0]]) ** 2, axis=1)
+        for k in range(1, num_points):
+            # The total is the last partial sum, so the draw stays in range
+            cumulative = np.cumsum(squared_distances)
+            if cumulative[-1] > 0:
+                chosen[k] = min(
+                    np.searchsorted(
+                        cumulative, rng.random() * cumulative[-1], side="right"
+                    ),
+                    num_candidates - 1,
+                )
+            else:
+                chosen[k] = rng.integers(num_candidates)
+            np.minimum(
+                squared_distances,
+                np.sum((candidates - candidates[chosen[k]]) ** 2, axis=1),
+                out=squared_distances,
+            )
+        return candidates[chosen]
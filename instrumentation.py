@@ -0,0 +1,67 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Shared no-op phase used when instrumentation is disabled
+NO_PHASE = nullcontext()
+
+
+class Instrumentation:
+    """Opt-in timers, counters and event hooks for a Lloyd algorithm run.
+
+    Phases are timed with phase(name), which accumulates the wall-clock
+    seconds and number of calls of every phase. Counters are incremented
+    with count(name, value). Every callback is called as
+    callback(event, data) for each emitted event: "phase" after each timed
+    phase, "iteration" after each iteration and "stop" at the end of
+    run_simulation.
+    """
+
+    def __init__(self, callbacks=()):
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.callbacks = list(callbacks)
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] += elapsed
+            self.calls[name] += 1
+            if self.callbacks:
+                self.emit("phase", name=name, elapsed=elapsed)
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def emit(self, event, **data):
+        for callback in self.callbacks:
+            callback(event, data)
+
+    def reset(self):
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def summary(self) -> dict:
+        return {
+            "timings": dict(self.timings),
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+        }
+
+    def report(self) -> str:
+        # Nested phases are included in the time of their enclosing phase
+        lines = [
+            f"{name:<16} {seconds:9.4f}s ({self.calls[name]} calls)"
+            for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1])
+        ]
+        lines += [f"{name:<16} {value}" for name, value in self.counters.items()]
+        return "\n".join(lines)
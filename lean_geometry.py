@@ -0,0 +1,159 @@
+"""
+Lightweight geometry types with __slots__ and explicit methods for the
+operations the Lloyd algorithm uses. They hold plain floats and tuples
+of floats instead of Shapely objects, so creating them and calling their
+methods involves no attribute proxying. The classes of geometry_tools
+delegate to them.
+"""
+
+import math
+
+
+class LeanPoint:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = float(x)
+        self.y = float(y)
+
+    def __eq__(self, other):
+        return isinstance(other, LeanPoint) and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"LeanPoint({self.x}, {self.y})"
+
+    @property
+    def coords(self) -> tuple:
+        return self.x, self.y
+
+    def distance(self, other: "LeanPoint") -> float:
+        return math.hypot(self.x - other.x, self.y - other.y)
+
+    def closest_point(self, point_list: list) -> "LeanPoint":
+        return min(point_list, key=self.distance)
+
+
+class LeanLine:
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: LeanPoint, end: LeanPoint):
+        if start == end:
+            raise ValueError("To define a Line, points must be different")
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"LeanLine({self.start!r}, {self.end!r})"
+
+    def get_projection_coordinate(self, point: LeanPoint) -> LeanPoint:
+        dx, dy = self.end.x - self.start.x, self.end.y - self.start.y
+        t = ((point.x - self.start.x) * dx + (point.y - self.start.y) * dy) / (
+            dx * dx + dy * dy
+        )
+        return LeanPoint(self.start.x + t * dx, self.start.y + t * dy)
+
+    def perpendicular_line(self, point: LeanPoint) -> "LeanLine":
+        dx, dy = self.end.x - self.start.x, self.end.y - self.start.y
+        return LeanLine(point, LeanPoint(point.x + dy, point.y - dx))
+
+
+class LeanPolygon:
+    """Simple polygon given by its vertices as a tuple of (x, y) floats.
+    Cells have a handful of vertices, so plain Python arithmetic is cheaper
+    here than NumPy calls on tiny arrays."""
+
+    __slots__ = ("vertices", "_moments", "_triangles")
+    expected_vertex_count = 3  # A polygon should have at least 3 vertices
+
+    def __init__(self, vertices):
+        vertices = tuple((float(x), float(y)) for x, y in vertices)
+        if len(vertices) > 1 and vertices[0] == vertices[-1]:
+            vertices = vertices[:-1]
+        self._check_vertices(vertices)
+        self.vertices = vertices
+        self._moments = None
+        self._triangles = None
+
+    def _check_vertices(self, vertices):
+        distinct_vertices = set(vertices)
+        if len(distinct_vertices) < self.expected_vertex_count:
+            raise ValueError(
+                f"A {self.__class__.__name__.lower()} must have at least {self.expected_vertex_count} distinct points."
+            )
+        if len(distinct_vertices) < len(vertices):
+            raise ValueError(
+                f"A {self.__class__.__name__.lower()} must have distinct points."
+            )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self.vertices)})"
+
+    def _edges(self, x0, y0):
+        # Consecutive vertices relative to (x0, y0) and their cross product
+        relative = [(x - x0, y - y0) for x, y in self.vertices]
+        for (ax, ay), (bx, by) in zip(relative, relative[1:] + relative[:1]):
+            yield ax, ay, bx, by, ax * by - bx * ay
+
+    def _invariants(self):
+        # Signed area, centroid and polar second moment about the centroid.
+        # The vertices never change, so they are computed once, relative to
+        # the first vertex for conditioning.
+        if self._moments is None:
+            x0, y0 = self.vertices[0]
+            total = sx = sy = moment = 0.0
+            for ax, ay, bx, by, cross in self._edges(x0, y0):
+                total += cross
+                sx += (ax + bx) * cross
+                sy += (ay + by) * cross
+                moment += (
+                    ax * ax + ax * bx + bx * bx + ay * ay + ay * by + by * by
+                ) * cross
+            gx, gy = sx / (3 * total), sy / (3 * total)
+            polar_moment = abs(moment) / 12 - abs(total) / 2 * (gx * gx + gy * gy)
+            self._moments = (total / 2, x0 + gx, y0 + gy, polar_moment)
+        return self._moments
+
+    @property
+    def signed_area(self) -> float:
+        return self._invariants()[0]
+
+    @property
+    def area(self) -> float:
+        return abs(self._invariants()[0])
+
+    @property
+    def centroid(self) -> LeanPoint:
+        _, gx, gy, _ = self._invariants()
+        return LeanPoint(gx, gy)
+
+    @property
+    def polar_moment(self) -> float:
+        return self._invariants()[3]
+
+    def average_square_distance(self, point: LeanPoint) -> float:
+        """Integral of the squared distance to point over the polygon, by the
+        parallel axis theorem."""
+        signed_area, gx, gy, polar_moment = self._invariants()
+        return polar_moment + abs(signed_area) * (
+            (gx - point.x) ** 2 + (gy - point.y) ** 2
+        )
+
+    def divide_convex_polygon_to_triangles(self) -> list["LeanTriangle"]:
+        if self._triangles is None:
+            v = self.vertices
+            self._triangles = [
+                LeanTriangle((v[0], v[i], v[i + 1])) for i in range(1, len(v) - 1)
+            ]
+        # A copy, so that callers cannot alter the cached list
+        return list(self._triangles)
+
+
+class LeanTriangle(LeanPolygon):
+    __slots__ = ()
+
+    def _check_vertices(self, vertices):
+        if len(vertices) != 3 or len(set(vertices)) != 3:
+            raise ValueError("A triangle must have 3 distinct points.")
@@ -1,33 +1,92 @@
-import random
+import json
+import os
+import time
+from dataclasses import dataclass
 
 import numpy as np
+import shapely
+from scipy.spatial import cKDTree
 
-from extended_voronoi import ExtendedVoronoi
+from extended_voronoi import ExtendedVoronoi, IncrementalVoronoi
 from geometry_tools import Point, Polygon
+from initializers import UniformInitializer
+from instrumentation import NO_PHASE
+from quadrature import TriangleQuadrature
+from update_rules import LloydUpdate
+
+
+@dataclass
+class SimulationResult:
+    prototypes: np.ndarray
+    distortion: float
+    # Distortion before the first iteration, then after each iteration
+    distortion_history: list[float]
+    iterations: int
+    stop_reason: str
 
 
 class LloydAlgorithm:
-    def __init__(self, boundary, num_points):
-        self.boundary = np.array(boundary)
-        self.boundary_polygon = Polygon(self.boundary)
+    # Distortion history restored by load_checkpoint for the next run
+    _resumed_history = None
+
+    def __init__(
+        self,
+        boundary,
+        num_points,
+        update_rule=None,
+        initializer=None,
+        rng=None,
+        instrumentation=None,
+    ):
+        self.boundary_polygon = LloydAlgorithm.boundary_shape(boundary)
+        # Outer ring vertices; holes are only in boundary_polygon
+        self.boundary = np.array(self.boundary_polygon._polygon.exterior.coords[:-1])
+        shapely.prepare(self.boundary_polygon._polygon)
         self.num_points = num_points
-        self.prototypes = self.generate_random_points()
-        self.polygon_list = self.voronoi_partition()
+        self.update_rule = update_rule or LloydUpdate()
+        self.initializer = initializer or UniformInitializer()
+        # Seed, or numpy Generator, for every random draw of the run
+        self.rng = np.random.default_rng(rng)
+        # Optional Instrumentation receiving phase timings, counters and events
+        self.instrumentation = instrumentation
+        self.prototype_coords = self.generate_random_points()
+        self.cells = self.voronoi_partition()
         self.distortion = self.calculate_distortion()
 
+    @staticmethod
+    def boundary_shape(boundary) -> Polygon:
+        """boundary as a Polygon: a sequence of vertices, or any simple
+        polygon with holes as a Shapely or geometry_tools Polygon."""
+        if isinstance(boundary, Polygon):
+            return boundary
+        if isinstance(boundary, shapely.Polygon):
+            return Polygon(boundary)
+        return Polygon(np.array(boundary))
+
+    @property
+    def prototypes(self) -> list[Point]:
+        # Point views of the prototype store, built on demand
+        return Point.coords_to_points(self.prototype_coords)
+
+    @prototypes.setter
+    def prototypes(self, points):
+        self.prototype_coords = Point.as_coord_array(points).copy()
+
+    def phase(self, name):
+        if self.instrumentation is None:
+            return NO_PHASE
+        return self.instrumentation.phase(name)
+
     def generate_random_points(self):
-        return [
-            Point(
-                random.uniform(self.boundary[0][0], self.boundary[2][0]),
-                random.uniform(self.boundary[0][1], self.boundary[2][1]),
-            )
-            for _ in range(self.num_points)
-        ]
+        return np.asarray(
+            self.initializer(self.boundary_polygon, self.num_points, self.rng),
+            dtype=np.float64,
+        ).reshape(-1, 2)
 
     def voronoi_partition(self):
         raise NotImplementedError("Subclasses must implement voronoi_partition method")
 
-    def compute_centroids(self, polygon_list):
+    def compute_centroids(self, cells):
         raise NotImplementedError("Subclasses must implement compute_centroids method")
 
     def calculate_distortion(self):
@@ -36,60 +95,486 @@ class LloydAlgorithm:
         )
 
     def update_points(self, centroids):
-        self.prototypes = centroids
+        points = self.update_rule.propose(self.prototype_coords, centroids)
+        if points is not centroids and not self.contains_points(points):
+            # Accelerated step left the boundary, take the plain step instead
+            self.update_rule.reset()
+            points = centroids
+        self.prototype_coords = self.backtrack(points)
+
+    def backtrack(self, points, max_halvings=10):
+        """Points moved back towards the current prototypes while outside
+        the boundary. On a non-convex boundary the centroid of a cell may
+        lie outside it; the step is halved until the prototype lands
+        inside, and after max_halvings it stays where it is. Every kept
+        step still brings the prototype closer to its centroid, so the
+        distortion cannot increase."""
+        points = np.array(points, dtype=np.float64)
+        outside = np.flatnonzero(~self.inside(points))
+        for _ in range(max_halvings):
+            if len(outside) == 0:
+                return points
+            points[outside] = (points[outside] + self.prototype_coords[outside]) / 2
+            outside = outside[~self.inside(points[outside])]
+        points[outside] = self.prototype_coords[outside]
+        return points
+
+    def inside(self, points) -> np.ndarray:
+        # Whether each point lies in the interior of the boundary
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return shapely.contains_xy(
+            self.boundary_polygon._polygon, points[:, 0], points[:, 1]
+        )
+
+    def contains_points(self, points) -> bool:
+        return bool(np.all(self.inside(points)))
 
     def single_iteration(self):
-        centroids = self.compute_centroids(self.polygon_list)
-        self.update_points(centroids)
-        self.polygon_list = self.voronoi_partition()
-        self.distortion = self.calculate_distortion()
+        with self.phase("centroids"):
+            centroids = self.compute_centroids(self.cells)
+        previous_distortion = self.distortion
+        with self.phase("update"):
+            self.update_points(centroids)
+        with self.phase("partition"):
+            self.cells = self.voronoi_partition()
+        with self.phase("distortion"):
+            self.distortion = self.calculate_distortion()
+
+        if self.update_rule.accelerated and not (
+            self.distortion <= previous_distortion
+        ):
+            # Safeguard: redo the iteration with the plain centroid step
+            self.update_rule.reset()
+            self.prototype_coords = np.asarray(centroids, dtype=np.float64)
+            with self.phase("partition"):
+                self.cells = self.voronoi_partition()
+            with self.phase("distortion"):
+                self.distortion = self.calculate_distortion()
+            if self.instrumentation is not None:
+                self.instrumentation.count("safeguards")
+
+        if self.instrumentation is not None:
+            self.instrumentation.count("iterations")
+            self.instrumentation.emit("iteration", distortion=self.distortion)
+
+    def run_simulation(
+        self,
+        num_iterations=None,
+        atol=None,
+        rtol=None,
+        max_displacement=None,
+        time_budget=None,
+        checkpoint_path=None,
+        checkpoint_every=10,
+    ) -> SimulationResult:
+        """Iterate until the first stopping criterion is met:
+
+        - num_iterations: number of iterations performed,
+        - atol / rtol: absolute / relative change of the distortion,
+        - max_displacement: largest distance moved by a prototype,
+        - time_budget: wall-clock seconds spent iterating,
+
+        or until a KeyboardInterrupt. Without any criterion the simulation
+        only stops on interruption.
 
-    def run_simulation(self, num_iterations=None):
-        iteration = 1
+        With a checkpoint_path, the state is saved there every
+        checkpoint_every iterations and when a criterion stops the run;
+        see resume_simulation. After load_checkpoint, the iterations and
+        history continue those of the checkpoint.
+        """
+        history = self._resumed_history or [self.distortion]
+        self._resumed_history = None
+        stop_reason = None
+        start_time = time.perf_counter()
         try:
-            while True:
+            while stop_reason is None:
+                previous_coords = self.prototype_coords.copy()
                 self.single_iteration()
-                print(f"Iteration {iteration}: Distortion = {self.distortion:.2f}")
-                iteration += 1
-
-                if num_iterations and iteration > num_iterations:
-                    print("Final prototypes:")
-                    for point in self.prototypes:
-                        print(f"({point.x}, {point.y})")
-                    break
+                history.append(self.distortion)
+                change = abs(history[-2] - history[-1])
+
+                if num_iterations and len(history) > num_iterations:
+                    stop_reason = "max_iterations"
+                elif atol is not None and change < atol:
+                    stop_reason = "atol"
+                elif rtol is not None and change < rtol * abs(history[-2]):
+                    stop_reason = "rtol"
+                elif max_displacement is not None and (
+                    np.linalg.norm(
+                        self.prototype_coords - previous_coords, axis=1
+                    ).max()
+                    < max_displacement
+                ):
+                    stop_reason = "max_displacement"
+                elif (
+                    time_budget is not None
+                    and time.perf_counter() - start_time >= time_budget
+                ):
+                    stop_reason = "time_budget"
+
+                if checkpoint_path is not None and (
+                    stop_reason is not None
+                    or (len(history) - 1) % checkpoint_every == 0
+                ):
+                    self.save_checkpoint(checkpoint_path, history)
         except KeyboardInterrupt:
-            print("\nSimulation stopped by user.")
-            print("Final prototypes:")
-            for point in self.prototypes:
-                print(f"({point.x}, {point.y})")
+            # The interrupted iteration is lost, the last checkpoint is kept
+            stop_reason = "interrupted"
+
+        if self.instrumentation is not None:
+            self.instrumentation.emit(
+                "stop", stop_reason=stop_reason, iterations=len(history) - 1
+            )
+
+        return SimulationResult(
+            self.prototype_coords.copy(),
+            self.distortion,
+            history,
+            len(history) - 1,
+            stop_reason,
+        )
+
+    def get_state(self) -> dict:
+        # Arrays needed to continue the run exactly where it stands
+        state = {
+            "prototype_coords": self.prototype_coords,
+            "rng_state": np.array(json.dumps(self.rng.bit_generator.state)),
+        }
+        for key, value in self.update_rule.get_state().items():
+            state[f"update_rule.{key}"] = value
+        return state
+
+    def set_state(self, state):
+        self.prototype_coords = np.array(state["prototype_coords"], dtype=np.float64)
+        self.rng.bit_generator.state = json.loads(str(state["rng_state"]))
+        self.update_rule.set_state(
+            {
+                key.split(".", 1)[1]: value
+                for key, value in state.items()
+                if key.startswith("update_rule.")
+            }
+        )
+        self.cells = self.voronoi_partition()
+        self.distortion = self.calculate_distortion()
+
+    def save_checkpoint(self, path, history):
+        """Write the state and the distortion history to the .npz file
+        path, through a temporary file so that a crash never leaves a
+        partial checkpoint."""
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(
+                file,
+                algorithm=np.array(type(self).__name__),
+                num_points=self.num_points,
+                distortion_history=np.asarray(history, dtype=np.float64),
+                **self.get_state(),
+            )
+        os.replace(temporary_path, path)
+
+    def load_checkpoint(self, path) -> list[float]:
+        """Restore the state saved in path into this algorithm, which must
+        have been built with the same arguments; returns the distortion
+        history, which the next run_simulation continues."""
+        with np.load(path) as checkpoint:
+            state = dict(checkpoint)
+        if (
+            str(state.pop("algorithm")) != type(self).__name__
+            or int(state.pop("num_points")) != self.num_points
+        ):
+            raise ValueError(f"Checkpoint {path} is for a different algorithm")
+        history = state.pop("distortion_history").tolist()
+        self.set_state(state)
+        self._resumed_history = history
+        return history
+
+    def resume_simulation(self, checkpoint_path, **kwargs) -> SimulationResult:
+        """Continue the run saved in checkpoint_path, bit for bit as if it
+        had never stopped, and keep checkpointing to the same file.
+        kwargs are the stopping criteria of run_simulation, counted from
+        the start of the original run for num_iterations."""
+        self.load_checkpoint(checkpoint_path)
+        return self.run_simulation(checkpoint_path=checkpoint_path, **kwargs)
 
 
 class ContinuousLloydAlgorithm(LloydAlgorithm):
+    """Lloyd algorithm over a continuous region.
+
+    density is an optional vectorized function rho(x, y) of coordinate
+    arrays; centroids and distortion are then integrated with a Gaussian
+    rule of the given quadrature_order over the fan triangles of all cells
+    at once, instead of the closed forms for a uniform density.
+    """
+
+    def __init__(
+        self,
+        boundary,
+        num_points,
+        backend="auto",
+        update_rule=None,
+        incremental=False,
+        density=None,
+        quadrature_order=4,
+        initializer=None,
+        rng=None,
+        instrumentation=None,
+    ):
+        self.backend = backend
+        self.density = density
+        self.quadrature = TriangleQuadrature(quadrature_order)
+        self._density_cells = None
+        # Warm-started Voronoi diagram kept between iterations
+        boundary = LloydAlgorithm.boundary_shape(boundary)
+        self.voronoi = (
+            IncrementalVoronoi(np.mean(boundary._polygon.exterior.coords[:-1], axis=0))
+            if incremental
+            else None
+        )
+        super().__init__(
+            boundary, num_points, update_rule, initializer, rng, instrumentation
+        )
+
+    @property
+    def polygon_list(self) -> list[tuple]:
+        # (prototype, Polygon) pairs built on demand from the packed cells
+        return [
+            (point, Polygon(self.cells.polygon_coords(i)))
+            for i, point in enumerate(self.prototype_coords)
+        ]
+
+    def get_state(self) -> dict:
+        state = super().get_state()
+        if self.voronoi is not None:
+            for key, value in self.voronoi.get_state().items():
+                state[f"voronoi.{key}"] = value
+        return state
+
+    def set_state(self, state):
+        if self.voronoi is not None:
+            self.voronoi.set_state(
+                {
+                    key.split(".", 1)[1]: value
+                    for key, value in state.items()
+                    if key.startswith("voronoi.")
+                }
+            )
+        super().set_state(state)
+
     def voronoi_partition(self):
-        return ExtendedVoronoi.region_split(
+        rebuilds = self.voronoi.rebuilds if self.voronoi is not None else 0
+        cells = ExtendedVoronoi.partition(
             self.boundary_polygon,
-            self.prototypes,
+            self.prototype_coords,
             np.linalg.norm(np.ptp(self.boundary, axis=0)),
+            self.backend,
+            self.voronoi,
+            self.instrumentation,
         )
+        if self.instrumentation is not None:
+            self.instrumentation.count(
+                "voronoi_rebuilds",
+                self.voronoi.rebuilds - rebuilds if self.voronoi is not None else 1,
+            )
+            self.instrumentation.count("cells", len(cells))
+            self.instrumentation.count("clipped_vertices", len(cells.vertices))
+        return cells
 
-    def compute_centroids(self, polygon_list):
-        return [p.centroid for _, p in polygon_list]
+    def density_nodes(self, cells):
+        """Quadrature nodes over the cells, their density-weighted weights
+        and the index of the cell of each node, cached for the last cells."""
+        if self._density_cells is None or self._density_cells[0] is not cells:
+            triangles, owners = cells.triangles()
+            nodes, weights = self.quadrature.nodes(triangles)
+            weights = weights * self.density(nodes[..., 0], nodes[..., 1])
+            owners = np.repeat(owners, weights.shape[1])
+            self._density_cells = (
+                cells,
+                nodes.reshape(-1, 2),
+                weights.ravel(),
+                owners,
+            )
+        return self._density_cells[1:]
+
+    def compute_centroids(self, cells):
+        if self.density is None and self.backend == "vectorized":
+            # One GEOS call over the array of cell geometries
+            centroids = shapely.centroid(cells.geometries)
+            return np.column_stack((shapely.get_x(centroids), shapely.get_y(centroids)))
+        if self.density is None:
+            return cells.centroids()
+        nodes, weights, owners = self.density_nodes(cells)
+        mass = np.bincount(owners, weights, minlength=len(cells))
+        moments = np.column_stack(
+            [
+                np.bincount(owners, weights * nodes[:, k], minlength=len(cells))
+                for k in range(2)
+            ]
+        )
+        return moments / mass[:, None]
 
     def calculate_distortion(self):
-        return sum(
-            p.average_square_distance(point) for point, p in self.polygon_list
-        ) / sum(p.area for _, p in self.polygon_list)
+        if self.density is None:
+            areas = (
+                shapely.area(self.cells.geometries)
+                if self.backend == "vectorized"
+                else self.cells.areas()
+            )
+            return self.cells.second_moments(self.prototype_coords).sum() / areas.sum()
+        nodes, weights, owners = self.density_nodes(self.cells)
+        offsets = nodes - self.prototype_coords[owners]
+        return np.dot(weights, np.einsum("ij,ij->i", offsets, offsets)) / weights.sum()
 
 
 class DiscreteLloydAlgorithm(LloydAlgorithm):
+    """Lloyd algorithm (k-means) over a weighted set of sample points.
+
+    The partition is the array of prototype labels of the samples, found
+    by nearest-prototype queries on a KD-tree.
+    """
+
+    def __init__(
+        self,
+        samples,
+        num_points,
+        weights=None,
+        update_rule=None,
+        rng=None,
+        instrumentation=None,
+    ):
+        self.samples = np.asarray(samples, dtype=np.float64).reshape(-1, 2)
+        self.weights = (
+            np.ones(len(self.samples))
+            if weights is None
+            else np.asarray(weights, dtype=np.float64)
+        )
+        (x_min, y_min), (x_max, y_max) = self.samples.min(0), self.samples.max(0)
+        boundary = [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+        super().__init__(
+            boundary, num_points, update_rule, rng=rng, instrumentation=instrumentation
+        )
+
+    def generate_random_points(self):
+        # Distinct samples drawn at random as initial prototypes
+        return self.samples[
+            self.rng.choice(len(self.samples), self.num_points, replace=False)
+        ]
+
+    def inside(self, points) -> np.ndarray:
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return np.all(
+            (points >= self.boundary[0]) & (points <= self.boundary[2]), axis=1
+        )
+
     def voronoi_partition(self):
-        # Implement discrete Voronoi partition logic
-        pass
+        _, labels = cKDTree(self.prototype_coords).query(self.samples, workers=-1)
+        return labels
 
-    def compute_centroids(self, polygon_list):
-        # Implement discrete centroid computation
-        pass
+    def compute_centroids(self, cells):
+        mass = np.bincount(cells, self.weights, minlength=self.num_points)
+        moments = np.column_stack(
+            [
+                np.bincount(
+                    cells, self.weights * self.samples[:, k], minlength=self.num_points
+                )
+                for k in range(2)
+            ]
+        )
+        # Prototypes without samples keep their position
+        centroids = self.prototype_coords.copy()
+        non_empty = mass > 0
+        centroids[non_empty] = moments[non_empty] / mass[non_empty, None]
+        return centroids
 
     def calculate_distortion(self):
-        # Implement discrete distortion calculation
-        pass
+        offsets = self.samples - self.prototype_coords[self.cells]
+        squared_distances = np.einsum("ij,ij->i", offsets, offsets)
+        return np.dot(self.weights, squared_distances) / self.weights.sum()
+
+
+class MiniBatchLloydAlgorithm:
+    """Discrete Lloyd algorithm fed with chunks of samples, for data sets
+    that do not fit in memory.
+
+    Each chunk is assigned to the current prototypes and added to running
+    per-cell weight sums and counts; each prototype is the mean of its
+    running sums, i.e. it moves towards the chunk centroid with a step
+    size decaying as 1 / count. decay < 1 forgets older chunks
+    geometrically. The distortion is estimated online from the squared
+    distances of each chunk at assignment time.
+    """
+
+    def __init__(self, num_points, decay=1.0, rng=None):
+        self.num_points = num_points
+        self.decay = decay
+        self.rng = np.random.default_rng(rng)
+        self.prototype_coords = None
+        self.sums = np.zeros((num_points, 2))
+        self.counts = np.zeros(num_points)
+        self.distortion = None
+        self.distortion_weight = 0.0
+        self.num_samples = 0
+
+    @staticmethod
+    def iter_chunks(source, chunk_size):
+        """Yield (samples, weights) chunks from a .npy path (memory-mapped),
+        an array, or an iterable of arrays or (samples, weights) pairs."""
+        if isinstance(source, (str, os.PathLike)):
+            source = np.load(source, mmap_mode="r")
+        if isinstance(source, np.ndarray):
+            for start in range(0, len(source), chunk_size):
+                yield np.asarray(source[start : start + chunk_size]), None
+            return
+        for chunk in source:
+            yield chunk if isinstance(chunk, tuple) else (chunk, None)
+
+    def partial_fit(self, samples, weights=None):
+        samples = np.asarray(samples, dtype=np.float64).reshape(-1, 2)
+        weights = (
+            np.ones(len(samples))
+            if weights is None
+            else np.asarray(weights, dtype=np.float64)
+        )
+        if self.prototype_coords is None:
+            if len(samples) < self.num_points:
+                raise ValueError(
+                    "The first chunk must hold at least num_points samples"
+                )
+            self.prototype_coords = samples[
+                self.rng.choice(len(samples), self.num_points, replace=False)
+            ]
+
+        squared_distances, labels = cKDTree(self.prototype_coords).query(
+            samples, workers=-1
+        )
+        squared_distances **= 2
+
+        self.sums *= self.decay
+        self.counts *= self.decay
+        self.counts += np.bincount(labels, weights, minlength=self.num_points)
+        for k in range(2):
+            self.sums[:, k] += np.bincount(
+                labels, weights * samples[:, k], minlength=self.num_points
+            )
+        non_empty = self.counts > 0
+        self.prototype_coords[non_empty] = (
+            self.sums[non_empty] / self.counts[non_empty, None]
+        )
+
+        chunk_weight = weights.sum()
+        self.distortion_weight = self.decay * self.distortion_weight + chunk_weight
+        chunk_distortion = np.dot(weights, squared_distances) / chunk_weight
+        if self.distortion is None:
+            self.distortion = chunk_distortion
+        else:
+            self.distortion += (
+                chunk_weight
+                / self.distortion_weight
+                * (chunk_distortion - self.distortion)
+            )
+        self.num_samples += len(samples)
+        return self
+
+    def fit(self, source, chunk_size=65536):
+        for samples, weights in self.iter_chunks(source, chunk_size):
+            self.partial_fit(samples, weights)
+        return self
@@ -0,0 +1,296 @@
+import numpy as np
+import shapely
+
+
+class PackedPolygons:
+    """A batch of polygons stored as one flat (V, 2) vertex array and an
+    (R + 1,) offset array of rings: ring r is the open ring
+    vertices[offsets[r]:offsets[r + 1]]. Polygon i is made of the rings
+    ring_offsets[i] to ring_offsets[i + 1], by default the single ring i,
+    in either orientation.
+
+    Polygons with holes or several parts have their outer rings in one
+    orientation and their holes in the other, so that the area, centroid
+    and second moment of area of every polygon are evaluated at once by
+    summing the shoelace-style edge formulas over all its rings.
+
+    geometries optionally holds the matching array of Shapely geometries,
+    when the polygons were built from them.
+    """
+
+    def __init__(self, vertices, offsets, ring_offsets=None, geometries=None):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        self.ring_offsets = (
+            np.arange(len(self.offsets), dtype=np.intp)
+            if ring_offsets is None
+            else np.asarray(ring_offsets, dtype=np.intp)
+        )
+        self.single_ring = len(self.ring_offsets) == len(self.offsets) and bool(
+            np.all(np.diff(self.ring_offsets) == 1)
+        )
+        self.geometries = geometries
+        self._triangles = None
+
+    @staticmethod
+    def from_polygons(polygons) -> "PackedPolygons":
+        polygons = [getattr(p, "_polygon", p) for p in polygons]
+        if any(PackedPolygons._has_several_rings(p) for p in polygons):
+            return PackedPolygons.from_geometries(
+                [
+                    (
+                        p
+                        if isinstance(p, shapely.Geometry)
+                        else shapely.Polygon(PackedPolygons._ring_coords(p))
+                    )
+                    for p in polygons
+                ]
+            )
+        rings = [PackedPolygons._ring_coords(p) for p in polygons]
+        offsets = np.zeros(len(rings) + 1, dtype=np.intp)
+        offsets[1:] = np.cumsum([len(ring) for ring in rings])
+        if not rings:
+            return PackedPolygons(np.empty((0, 2)), offsets)
+        return PackedPolygons(np.concatenate(rings), offsets)
+
+    @staticmethod
+    def from_geometries(geometries) -> "PackedPolygons":
+        """Vectorized packing of an array of Shapely polygonal geometries
+        (Polygon, MultiPolygon or collections, as returned by
+        shapely.intersection); empty geometries give empty polygons and
+        non-polygonal parts are dropped."""
+        geometries = np.asarray(geometries, dtype=object)
+        # Exteriors counter-clockwise and holes clockwise
+        parts, part_owners = shapely.get_parts(
+            shapely.orient_polygons(geometries), return_index=True
+        )
+        polygonal = shapely.get_type_id(parts) == shapely.GeometryType.POLYGON
+        parts, part_owners = parts[polygonal], part_owners[polygonal]
+        rings, ring_parts = shapely.get_rings(parts, return_index=True)
+        coords, vertex_rings = shapely.get_coordinates(rings, return_index=True)
+
+        # Drop the closing vertex of every ring
+        ring_sizes = np.bincount(vertex_rings, minlength=len(rings)) - 1
+        keep = np.ones(len(coords), dtype=bool)
+        keep[np.cumsum(ring_sizes + 1) - 1] = False
+        offsets = np.zeros(len(rings) + 1, dtype=np.intp)
+        offsets[1:] = np.cumsum(ring_sizes)
+        ring_offsets = np.zeros(len(geometries) + 1, dtype=np.intp)
+        ring_offsets[1:] = np.cumsum(
+            np.bincount(part_owners[ring_parts], minlength=len(geometries))
+        )
+        return PackedPolygons(coords[keep], offsets, ring_offsets, geometries)
+
+    def to_geometries(self) -> np.ndarray:
+        """Array of Shapely polygons, one per polygon, in order."""
+        if self.geometries is not None:
+            return self.geometries
+        if not self.single_ring:
+            raise ValueError("Only single-ring polygons can be rebuilt")
+        sizes = self.ring_sizes()
+        valid = sizes >= 3
+        geometries = np.full(len(self), shapely.Polygon(), dtype=object)
+        rings = shapely.linearrings(
+            self.vertices[np.repeat(valid, sizes)],
+            indices=np.repeat(np.arange(valid.sum()), sizes[valid]),
+        )
+        geometries[valid] = shapely.polygons(rings)
+        return geometries
+
+    @staticmethod
+    def concatenate(batches) -> "PackedPolygons":
+        # Polygons of all batches, one batch after the other
+        vertices = np.concatenate([batch.vertices for batch in batches])
+        vertex_starts = np.cumsum([0] + [len(batch.vertices) for batch in batches])
+        ring_starts = np.cumsum([0] + [len(batch.offsets) - 1 for batch in batches])
+        offsets = np.concatenate(
+            [[0]]
+            + [
+                batch.offsets[1:] + start
+                for batch, start in zip(batches, vertex_starts)
+            ]
+        )
+        ring_offsets = np.concatenate(
+            [[0]]
+            + [
+                batch.ring_offsets[1:] + start
+                for batch, start in zip(batches, ring_starts)
+            ]
+        )
+        return PackedPolygons(vertices, offsets, ring_offsets)
+
+    @staticmethod
+    def _ranges(starts, counts):
+        # Concatenation of the ranges starts[k]:starts[k] + counts[k]
+        ends = np.cumsum(counts)
+        return np.repeat(starts - ends + counts, counts) + np.arange(
+            ends[-1] if len(ends) else 0
+        )
+
+    def take(self, indices) -> "PackedPolygons":
+        """The polygons at indices, in that order."""
+        indices = np.asarray(indices, dtype=np.intp)
+        ring_counts = np.diff(self.ring_offsets)[indices]
+        rings = PackedPolygons._ranges(self.ring_offsets[indices], ring_counts)
+        vertex_counts = np.diff(self.offsets)[rings]
+        vertices = self.vertices[
+            PackedPolygons._ranges(self.offsets[rings], vertex_counts)
+        ]
+        offsets = np.concatenate(([0], np.cumsum(vertex_counts)))
+        ring_offsets = np.concatenate(([0], np.cumsum(ring_counts)))
+        return PackedPolygons(vertices, offsets, ring_offsets)
+
+    @staticmethod
+    def _has_several_rings(polygon) -> bool:
+        return isinstance(polygon, shapely.Geometry) and not (
+            isinstance(polygon, shapely.Polygon) and not polygon.interiors
+        )
+
+    @staticmethod
+    def _ring_coords(polygon):
+        # Accepts geometry_tools shapes, shapely polygons or vertex arrays
+        polygon = getattr(polygon, "_polygon", polygon)
+        if hasattr(polygon, "exterior"):
+            coords = np.asarray(polygon.exterior.coords, dtype=np.float64)
+            return coords[:-1] if len(coords) else coords.reshape(0, 2)
+        coords = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        if len(coords) > 1 and np.array_equal(coords[0], coords[-1]):
+            return coords[:-1]
+        return coords
+
+    def __len__(self):
+        return len(self.ring_offsets) - 1
+
+    def ring_sizes(self):
+        return np.diff(self.offsets)
+
+    def ring_owners(self):
+        # Index of the polygon of every ring
+        return np.repeat(np.arange(len(self)), np.diff(self.ring_offsets))
+
+    def sizes(self):
+        if self.single_ring:
+            return self.ring_sizes()
+        return np.bincount(
+            self.ring_owners(), self.ring_sizes(), minlength=len(self)
+        ).astype(np.intp)
+
+    def owners(self):
+        if self.single_ring:
+            return np.repeat(np.arange(len(self)), self.ring_sizes())
+        return np.repeat(self.ring_owners(), self.ring_sizes())
+
+    def ring_coords(self, r):
+        return self.vertices[self.offsets[r] : self.offsets[r + 1]]
+
+    def polygon_coords(self, i):
+        # Outer ring of polygon i, or of its first part
+        if self.ring_offsets[i] == self.ring_offsets[i + 1]:
+            return self.vertices[:0]
+        return self.ring_coords(self.ring_offsets[i])
+
+    def polygon_rings(self, i):
+        return [
+            self.ring_coords(r)
+            for r in range(self.ring_offsets[i], self.ring_offsets[i + 1])
+        ]
+
+    def triangles(self):
+        """Triangulation of every polygon, as a (T, 3, 2) array of triangles
+        and the (T,) index of the polygon owning each: the fan triangles
+        for single-ring (convex) polygons, a constrained Delaunay
+        triangulation of the Shapely geometries otherwise. It is computed
+        once, the polygons being immutable."""
+        if self._triangles is None:
+            if self.geometries is None:
+                self._triangles = self.fan_triangles()
+            else:
+                parts, owners = shapely.get_parts(
+                    shapely.constrained_delaunay_triangles(self.geometries),
+                    return_index=True,
+                )
+                coords = shapely.get_coordinates(parts).reshape(-1, 4, 2)
+                self._triangles = coords[:, :3], owners
+        return self._triangles
+
+    def fan_triangles(self):
+        """Fan triangulation of every ring from its first vertex, as in
+        Polygon.divide_convex_polygon_to_triangles, exact for convex
+        single-ring polygons: a (T, 3, 2) array of triangles and the (T,)
+        index of the polygon owning each."""
+        sizes = np.maximum(self.ring_sizes() - 2, 0)
+        owners = np.repeat(np.arange(len(self.offsets) - 1), sizes)
+        first = self.offsets[:-1][owners]
+        # Position of each triangle within its polygon's fan, starting at 1
+        rank = np.arange(len(owners)) - np.repeat(np.cumsum(sizes) - sizes, sizes) + 1
+        triangles = np.stack(
+            (
+                self.vertices[first],
+                self.vertices[first + rank],
+                self.vertices[first + rank + 1],
+            ),
+            axis=1,
+        )
+        if not self.single_ring:
+            owners = self.ring_owners()[owners]
+        return triangles, owners
+
+    def _next_index(self):
+        # Index of the next vertex along every ring
+        nxt = np.arange(1, len(self.vertices) + 1)
+        non_empty = self.ring_sizes() > 0
+        nxt[self.offsets[1:][non_empty] - 1] = self.offsets[:-1][non_empty]
+        return nxt
+
+    def _edges(self, origins):
+        # Edge endpoints expressed relative to one origin per polygon
+        owners = self.owners()
+        a = self.vertices - origins[owners]
+        b = a[self._next_index()]
+        cross = a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1]
+        return owners, a, b, cross
+
+    def _reference_points(self):
+        # First vertex of every polygon, used as a well-conditioned origin
+        origins = np.zeros((len(self), 2))
+        non_empty = self.sizes() > 0
+        origins[non_empty] = self.vertices[
+            self.offsets[self.ring_offsets[:-1][non_empty]]
+        ]
+        return origins
+
+    def signed_areas(self):
+        owners, _, _, cross = self._edges(self._reference_points())
+        return 0.5 * np.bincount(owners, cross, minlength=len(self))
+
+    def areas(self):
+        return np.abs(self.signed_areas())
+
+    def centroids(self):
+        origins = self._reference_points()
+        owners, a, b, cross = self._edges(origins)
+        signed_area = 0.5 * np.bincount(owners, cross, minlength=len(self))
+        first_moment = np.column_stack(
+            [
+                np.bincount(owners, (a[:, k] + b[:, k]) * cross, minlength=len(self))
+                for k in range(2)
+            ]
+        )
+        return origins + first_moment / (6 * signed_area[:, None])
+
+    def second_moments(self, points):
+        """Integral of the squared distance to points[i] over polygon i, for
+        every polygon, i.e. its polar second moment of area about points[i].
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(len(self), 2)
+        owners, a, b, cross = self._edges(points)
+        sign = np.sign(np.bincount(owners, cross, minlength=len(self)))
+        squares = (
+            a[:, 0] ** 2
+            + a[:, 0] * b[:, 0]
+            + b[:, 0] ** 2
+            + a[:, 1] ** 2
+            + a[:, 1] * b[:, 1]
+            + b[:, 1] ** 2
+        )
+        return sign * np.bincount(owners, squares * cross, minlength=len(self)) / 12
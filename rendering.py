@@ -0,0 +1,219 @@
+"""
+Frame pipeline for animations of a Lloyd algorithm run. A FrameProducer
+iterates the algorithm in a worker thread and publishes a snapshot every
+few iterations; the Tk Animation or the HeadlessRenderer consume them
+without ever blocking the solver, and only the latest frames are kept.
+"""
+
+import os
+import queue
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from packed_polygons import PackedPolygons
+
+CELL_COLORS = [
+    "#FFC300",
+    "#DAF7A6",
+    "#FF5733",
+    "#C70039",
+    "#6857E6",
+    "#FF6F61",
+    "#5E503F",
+    "#00A8CC",
+    "#F5D0C4",
+]
+
+
+@dataclass
+class Frame:
+    iteration: int
+    distortion: float
+    cells: PackedPolygons
+    prototypes: np.ndarray
+
+    @staticmethod
+    def capture(lloyd, iteration) -> "Frame":
+        # Copies, so that the frame outlives the next iteration
+        return Frame(
+            iteration,
+            lloyd.distortion,
+            PackedPolygons(
+                lloyd.cells.vertices.copy(),
+                lloyd.cells.offsets.copy(),
+                lloyd.cells.ring_offsets.copy(),
+            ),
+            lloyd.prototype_coords.copy(),
+        )
+
+
+def cell_rings(cells, i):
+    """Rings of cell i as (coords, is_hole) pairs. The first ring is an
+    outer ring; rings wound the other way are holes, the others are further
+    parts of the cell."""
+    rings = cells.polygon_rings(i)
+    signs = [
+        np.sign(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+        for x, y in (ring.T for ring in rings)
+    ]
+    return [(ring, sign != signs[0]) for ring, sign in zip(rings, signs)]
+
+
+def cell_path(cells, i):
+    # Vertices and Matplotlib path codes of all the rings of cell i
+    from matplotlib.path import Path
+
+    vertices, codes = [], []
+    for ring in cells.polygon_rings(i):
+        vertices.append(np.vstack((ring, ring[:1])))
+        codes.append(np.full(len(ring) + 1, Path.LINETO, dtype=Path.code_type))
+        codes[-1][[0, -1]] = Path.MOVETO, Path.CLOSEPOLY
+    if not vertices:
+        return np.empty((0, 2)), np.empty(0, dtype=Path.code_type)
+    return np.concatenate(vertices), np.concatenate(codes)
+
+
+class FrameProducer(threading.Thread):
+    """Runs num_iterations iterations of lloyd (until stopped if None) in a
+    worker thread and puts a Frame in frames every 'every' iterations. When
+    the consumer falls behind, the oldest pending frame is dropped unless
+    lossless is set, in which case the solver waits."""
+
+    def __init__(self, lloyd, num_iterations=None, every=1, buffer=4, lossless=False):
+        super().__init__(daemon=True)
+        self.lloyd = lloyd
+        self.num_iterations = num_iterations
+        self.every = every
+        self.lossless = lossless
+        self.frames = queue.Queue(maxsize=buffer)
+        self.stop_event = threading.Event()
+        self.error = None
+
+    def publish(self, frame):
+        while not self.stop_event.is_set():
+            try:
+                self.frames.put(frame, timeout=0.1 if self.lossless else 0)
+                return
+            except queue.Full:
+                if not self.lossless:
+                    try:
+                        self.frames.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def run(self):
+        try:
+            self.publish(Frame.capture(self.lloyd, 0))
+            iteration = 0
+            while not self.stop_event.is_set() and (
+                self.num_iterations is None or iteration < self.num_iterations
+            ):
+                self.lloyd.single_iteration()
+                iteration += 1
+                if iteration % self.every == 0 or iteration == self.num_iterations:
+                    self.publish(Frame.capture(self.lloyd, iteration))
+        except Exception as error:
+            self.error = error
+        finally:
+            # End of stream marker
+            self.publish(None)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def __iter__(self):
+        # Frames in order until the producer ends, for a single consumer
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield frame
+
+
+class HeadlessRenderer:
+    """Draws frames with Matplotlib's Agg backend, without any display.
+    The cell and prototype artists are created once and only their
+    geometry is updated for the following frames; cells are drawn with
+    their holes."""
+
+    def __init__(self, boundary, figsize=(8, 6), dpi=100):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import PolyCollection
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Polygon as PolygonPatch
+
+        self.boundary = np.asarray(boundary, dtype=np.float64)
+        # A bare Agg figure, independent of pyplot and its global backend
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.axes.set_aspect("equal")
+        self.axes.set_axis_off()
+        (x_min, y_min), (x_max, y_max) = self.boundary.min(0), self.boundary.max(0)
+        self.axes.set_xlim(x_min, x_max)
+        # Screen coordinates, as on the Tk canvas
+        self.axes.set_ylim(y_max, y_min)
+        self.cells = PolyCollection([], edgecolor="black", linewidth=0.5)
+        self.axes.add_collection(self.cells)
+        self.points = self.axes.scatter([], [], s=4, color="black", zorder=2)
+        self.axes.add_patch(PolygonPatch(self.boundary, fill=False, edgecolor="green"))
+        self.title = self.axes.set_title("")
+
+    def draw(self, frame: Frame):
+        paths = [cell_path(frame.cells, i) for i in range(len(frame.cells))]
+        self.cells.set_verts_and_codes(
+            [vertices for vertices, _ in paths], [codes for _, codes in paths]
+        )
+        self.cells.set_facecolor(
+            [CELL_COLORS[i % len(CELL_COLORS)] for i in range(len(frame.cells))]
+        )
+        self.points.set_offsets(frame.prototypes)
+        self.title.set_text(
+            f"iteration {frame.iteration}, d_omega = {frame.distortion:.2f}"
+        )
+        return self.cells, self.points, self.title
+
+    def save_frames(self, frames, directory, pattern="frame_{:05d}.png"):
+        """Write every frame as an image file in directory; returns the
+        paths written."""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for frame in frames:
+            self.draw(frame)
+            paths.append(os.path.join(directory, pattern.format(frame.iteration)))
+            self.figure.savefig(paths[-1])
+        return paths
+
+    def save_animation(self, frames, path, fps=20):
+        """Write the frames as one animated file: a GIF through Pillow, or
+        any format ffmpeg supports, such as MP4."""
+        from matplotlib.animation import FFMpegWriter, PillowWriter
+
+        writer = (
+            PillowWriter(fps=fps) if path.endswith(".gif") else FFMpegWriter(fps=fps)
+        )
+        with writer.saving(self.figure, path, self.figure.dpi):
+            for frame in frames:
+                self.draw(frame)
+                writer.grab_frame()
+
+
+def record_animation(lloyd, path, num_iterations, every=1, fps=20):
+    """Run num_iterations iterations of lloyd in a worker thread and record
+    every 'every'-th one to path: a directory of PNG frames, or an animated
+    file (.gif, .mp4) otherwise."""
+    producer = FrameProducer(lloyd, num_iterations, every, lossless=True)
+    renderer = HeadlessRenderer(lloyd.boundary)
+    producer.start()
+    try:
+        if os.path.splitext(path)[1]:
+            renderer.save_animation(producer, path, fps)
+        else:
+            renderer.save_frames(producer, path)
+    finally:
+        producer.stop()
+        producer.join()
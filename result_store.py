@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+RESULT_DTYPE = np.dtype(
+    [
+        ("num_prototypes", "<i4"),
+        ("trial", "<i4"),
+        ("seed", "<u8"),
+        ("iterations", "<i4"),
+        ("distortion", "<f8"),
+        ("runtime", "<f8"),
+    ]
+)
+MAGIC = b"LLOYDRS1"
+HEADER_SIZE = 16
+
+
+class ResultStore:
+    """Append-only file of fixed-size trial records (RESULT_DTYPE) after a
+    16-byte header, read back as a memory-mapped structured array.
+
+    Every append is written to the file at once, so the results of a
+    sweep survive a crash of the process; sync also forces them to disk,
+    against a crash of the machine, and is called once per batch. A record
+    cut short by a crash is ignored when reading. Failed trials have a NaN
+    distortion and -1 iterations.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, "wb") as file:
+                file.write(MAGIC.ljust(HEADER_SIZE, b"\0"))
+        else:
+            with open(self.path, "rb") as file:
+                if file.read(HEADER_SIZE).rstrip(b"\0") != MAGIC:
+                    raise ValueError(f"{self.path} is not a result store")
+
+    def append(self, records):
+        records = np.asarray(records, dtype=RESULT_DTYPE).reshape(-1)
+        with open(self.path, "ab") as file:
+            file.write(records.tobytes())
+
+    def sync(self):
+        with open(self.path, "ab") as file:
+            os.fsync(file.fileno())
+
+    def add(self, num_prototypes, trial, seed, iterations, distortion, runtime):
+        self.append(
+            np.array(
+                [(num_prototypes, trial, seed, iterations, distortion, runtime)],
+                dtype=RESULT_DTYPE,
+            )
+        )
+
+    def __len__(self):
+        return (os.path.getsize(self.path) - HEADER_SIZE) // RESULT_DTYPE.itemsize
+
+    def read(self) -> np.ndarray:
+        """Read-only memory map of all complete records."""
+        if len(self) == 0:
+            return np.empty(0, dtype=RESULT_DTYPE)
+        return np.memmap(
+            self.path, RESULT_DTYPE, mode="r", offset=HEADER_SIZE, shape=(len(self),)
+        )
+
+    def select(self, num_prototypes=None, passed=True) -> np.ndarray:
+        # Records of one number of prototypes, without failed trials
+        records = self.read()
+        mask = np.ones(len(records), dtype=bool)
+        if num_prototypes is not None:
+            mask &= records["num_prototypes"] == num_prototypes
+        if passed:
+            mask &= ~np.isnan(records["distortion"])
+        return records[mask]
+
+
+def distortion_histogram(distortions, interval):
+    """Counts of distortions in consecutive bins of width interval,
+    starting at the smallest value, and the bin edges."""
+    distortions = np.asarray(distortions, dtype=np.float64)
+    if len(distortions) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(1)
+    low = distortions.min()
+    num_bins = max(int(np.floor((distortions.max() - low) / interval)) + 1, 1)
+    return np.histogram(distortions, num_bins, (low, low + num_bins * interval))
@@ -1,40 +1,175 @@
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
+import numpy as np
 
 from lloyd_algorithm import ContinuousLloydAlgorithm
+from result_store import ResultStore, distortion_histogram
 
 
-def run_lloyd_algorithm(boundary, num_prototypes):
-    lloyd = ContinuousLloydAlgorithm(boundary, num_prototypes)
-    dst = lloyd.distortion
-    idx_iteration = 0
-    while True:
-        idx_iteration += 1
-        lloyd.single_iteration()
-        if abs(dst - lloyd.distortion) < 0.001:
-            break
-        dst = lloyd.distortion
-    return lloyd.distortion, idx_iteration
+@dataclass(frozen=True)
+class TrialOptions:
+    """Settings shared by all the trials of a study: every trial stops once
+    the distortion changes by less than atol (or rtol), with the given
+    clipping backend of ContinuousLloydAlgorithm."""
+
+    initializer: object = None
+    atol: float = 0.001
+    rtol: float = None
+    backend: str = "auto"
+
+
+def run_lloyd_algorithm(boundary, num_prototypes, seed=None, options=TrialOptions()):
+    lloyd = ContinuousLloydAlgorithm(
+        boundary,
+        num_prototypes,
+        options.backend,
+        initializer=options.initializer,
+        rng=seed,
+    )
+    result = lloyd.run_simulation(atol=options.atol, rtol=options.rtol)
+    return result.distortion, result.iterations
+
+
+def trial_seeds(seed, num_prototypes, nb_tests):
+    # Independent, reproducible seed for every (num_prototypes, test) pair
+    return [
+        int(s)
+        for s in np.random.SeedSequence([seed, num_prototypes]).generate_state(
+            nb_tests, dtype=np.uint64
+        )
+    ]
+
+
+def run_trial(task):
+    try:
+        return run_lloyd_algorithm(*task)
+    except Exception:
+        return None
+
+
+def run_timed_trial(task):
+    start_time = time.perf_counter()
+    return run_trial(task), time.perf_counter() - start_time
+
+
+def study_trials(function, boundary, prototype_range, nb_tests, seed, workers, options):
+    """Map function over the (boundary, num_prototypes, seed, options)
+    tasks of every number of prototypes, on a pool of workers processes
+    (all cores by default, in-process if workers is 1). Yields
+    (num_prototypes, seeds, outcomes) as soon as the tasks are submitted,
+    with the outcomes in test order."""
+    workers = workers or os.cpu_count()
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for num_prototypes in prototype_range:
+            seeds = trial_seeds(seed, num_prototypes, nb_tests)
+            tasks = [(boundary, num_prototypes, s, options) for s in seeds]
+            if executor is None:
+                outcomes = map(function, tasks)
+            else:
+                chunksize = max(1, nb_tests // (4 * workers))
+                outcomes = executor.map(function, tasks, chunksize=chunksize)
+            yield num_prototypes, seeds, outcomes
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def run_study(
+    boundary,
+    prototype_range,
+    nb_tests,
+    seed=0,
+    workers=None,
+    initializer=None,
+    store=None,
+    atol=0.001,
+    rtol=None,
+    backend="auto",
+):
+    """Run nb_tests seeded Lloyd trials for every number of prototypes in
+    prototype_range, spread over a pool of workers processes (all cores by
+    default, in-process if workers is 1), with the TrialOptions given by
+    initializer, atol, rtol and backend.
+
+    Returns {num_prototypes: (distortion_dict, elapsed_time)} where
+    distortion_dict maps each passed test number to (distortion,
+    iterations), in test order regardless of scheduling.
+
+    With a store (a ResultStore or its path), every trial is instead
+    appended to it as soon as it completes and the store is returned.
+    """
+    options = TrialOptions(initializer, atol, rtol, backend)
+    if store is not None:
+        return stream_study(
+            ResultStore(store) if not isinstance(store, ResultStore) else store,
+            boundary,
+            prototype_range,
+            nb_tests,
+            seed,
+            workers,
+            options,
+        )
+
+    results = {}
+    for num_prototypes, _, outcomes in study_trials(
+        run_trial, boundary, prototype_range, nb_tests, seed, workers, options
+    ):
+        start_time = time.time()
+        distortion_dict = {
+            idx_test: outcome
+            for idx_test, outcome in enumerate(outcomes)
+            if outcome is not None
+        }
+        results[num_prototypes] = (distortion_dict, time.time() - start_time)
+    return results
+
+
+def stream_study(store, boundary, prototype_range, nb_tests, seed, workers, options):
+    for num_prototypes, seeds, outcomes in study_trials(
+        run_timed_trial, boundary, prototype_range, nb_tests, seed, workers, options
+    ):
+        for idx_test, (outcome, runtime) in enumerate(outcomes):
+            distortion, iterations = outcome or (np.nan, -1)
+            store.add(
+                num_prototypes,
+                idx_test,
+                seeds[idx_test],
+                iterations,
+                distortion,
+                runtime,
+            )
+        # One disk sync per number of prototypes, not per trial
+        store.sync()
+    return store
 
 
 def group_distortion_by_range(distortion_dict, interval):
+    # Non-empty bins of width interval, keyed by their rounded center
     distortion_values = [v[0] for v in distortion_dict.values()]
-    grouped_distortion = {}
-    for value in distortion_values:
-        added = False
-        for key in grouped_distortion:
-            if abs(key - value) < interval:
-                grouped_distortion[key] += 1
-                added = True
-                break
-        if not added:
-            grouped_distortion[round(value)] = 1
+    counts, edges = distortion_histogram(distortion_values, interval)
+    centers = (edges[:-1] + edges[1:]) / 2
+    grouped_distortion = {
+        round(center): int(count) for center, count in zip(centers, counts) if count
+    }
     return grouped_distortion, len(distortion_values)
 
 
-def plot_histogram(distortion_dict, num_prototypes):
+def plot_histogram(
+    distortion_dict,
+    num_prototypes,
+    interval,
+    nb_tests,
+    elapsed_time,
+    directory="./figs",
+):
+    # Imported here so that running a study never loads matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import MaxNLocator
+
     grouped_distortion, nbr_passed_test = group_distortion_by_range(
         distortion_dict, interval
     )
@@ -81,9 +216,14 @@ def plot_histogram(distortion_dict, num_prototypes):
     )
 
     plt.tight_layout()
-    plt.savefig(f"./figs/histogram_{num_prototypes}.png", bbox_inches="tight")
+    plt.savefig(
+        os.path.join(directory, f"histogram_{num_prototypes}.png"), bbox_inches="tight"
+    )
+    plt.close()
 
-    with open(f"./figs/grouped_distortions_{num_prototypes}.txt", "w") as file:
+    with open(
+        os.path.join(directory, f"grouped_distortions_{num_prototypes}.txt"), "w"
+    ) as file:
         file.write(f"Grouped Distortion Values for {num_prototypes} Prototypes:\n")
         file.write(f"Number of Tests: {nb_tests}\n")
         file.write(f"Number of Passed Tests: {nbr_passed_test}\n")
@@ -93,7 +233,9 @@ def plot_histogram(distortion_dict, num_prototypes):
                 f"Distortion: {key} - Count: {value} - Frequency: {value / nbr_passed_test * 100}%\n"
             )
 
-    with open(f"./figs/distortion_values_{num_prototypes}.txt", "w") as file:
+    with open(
+        os.path.join(directory, f"distortion_values_{num_prototypes}.txt"), "w"
+    ) as file:
         file.write(f"Distortion Values for {num_prototypes} Prototypes:\n")
         for test_nbr, (dst, iter) in distortion_dict.items():
             file.write(
@@ -101,25 +243,45 @@ def plot_histogram(distortion_dict, num_prototypes):
             )
 
 
-boundary = [[100, 100], [700, 100], [700, 400], [100, 400]]
-nb_tests = 100
-interval = 2
+def plot_store(store, interval, nb_tests, directory="./figs"):
+    """Histograms of the results saved in a store (or at its path), without
+    running any trial again; the elapsed time of each number of
+    prototypes is the sum of the runtimes of its trials."""
+    store = ResultStore(store) if not isinstance(store, ResultStore) else store
+    records = store.select()
+    for num_prototypes in np.unique(records["num_prototypes"]):
+        rows = records[records["num_prototypes"] == num_prototypes]
+        distortion_dict = {
+            int(row["trial"]): (float(row["distortion"]), int(row["iterations"]))
+            for row in rows
+        }
+        elapsed_time = float(
+            store.select(num_prototypes, passed=False)["runtime"].sum()
+        )
+        print(
+            f"Total Execution Time for {num_prototypes} Prototypes: {elapsed_time:.4f} seconds"
+        )
+        plot_histogram(
+            distortion_dict,
+            int(num_prototypes),
+            interval,
+            nb_tests,
+            elapsed_time,
+            directory,
+        )
 
-for num_prototypes in range(3, 15):
-    distortion_dict = {}
 
-    start_time = time.time()
-    for idx_test in range(nb_tests):
-        try:
-            distortion, idx_iteration = run_lloyd_algorithm(boundary, num_prototypes)
-            distortion_dict[idx_test] = (distortion, idx_iteration)
-        except Exception:
-            pass
+if __name__ == "__main__":
+    import sys
 
-    end_time = time.time()
-    elapsed_time = end_time - start_time
-    print(
-        f"Total Execution Time for {num_prototypes} Prototypes: {elapsed_time:.4f} seconds"
-    )
+    from distortion_minimization import main
 
-    plot_histogram(distortion_dict, num_prototypes)
+    # Same sweep through the command line, which refuses to replace the
+    # results of an earlier one unless --append or --overwrite is passed;
+    # plot_store can reanalyse them later
+    os.makedirs("./figs", exist_ok=True)
+    main(
+        ["study", "--range", "3:15", "--tests", "100", "--interval", "2"]
+        + ["--store", "./figs/results.bin", "--plot", "./figs"]
+        + sys.argv[1:]
+    )
@@ -0,0 +1,30 @@
+import numpy as np
+
+from batch_lloyd_algorithm import BatchContinuousLloydAlgorithm
+from lloyd_algorithm import ContinuousLloydAlgorithm
+
+# Define a boundary, number of points and number of instances
+boundary = [[100, 100], [700, 100], [700, 400], [100, 400]]
+num_points = 6
+num_instances = 20
+
+batch = BatchContinuousLloydAlgorithm(boundary, num_points, num_instances)
+initial_prototypes = batch.prototype_coords.copy()
+batch.run_simulation()
+print("Iterations", batch.iterations)
+print("Distortions", batch.distortion)
+
+print("----------------------------------")
+
+# Each instance matches a standalone run from the same prototypes
+errors = 0
+for k in range(num_instances):
+    lloyd = ContinuousLloydAlgorithm(boundary, num_points)
+    lloyd.prototypes = initial_prototypes[k]
+    lloyd.cells = lloyd.voronoi_partition()
+    lloyd.distortion = lloyd.calculate_distortion()
+    for _ in range(batch.iterations[k]):
+        lloyd.single_iteration()
+    if not np.allclose(lloyd.prototype_coords, batch.prototype_coords[k]):
+        errors += 1
+print(errors, "error(s)")
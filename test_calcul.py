@@ -1,5 +1,7 @@
 import random
 
+import numpy as np
+
 from geometry_tools import Point, Polygon, Triangle
 
 # define a triangle
@@ -18,13 +20,8 @@ print("Theoretical value", theoretical_value)
 
 # using Monte Carlo
 def estimate(cls, shape, point, n=1000):
-    estimation = 0
-
-    for _ in range(n):
-        random_point = cls.random_point_in_shape(shape)
-        estimation += point.distance(random_point) ** 2
-
-    return estimation / n
+    random_points = cls.random_points_in_shape(shape, n)
+    return np.mean(np.sum((random_points - (point.x, point.y)) ** 2, axis=1))
 
 
 estimation = estimate(Triangle, triangle, m)
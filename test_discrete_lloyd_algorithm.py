@@ -0,0 +1,66 @@
+import os
+import tempfile
+
+import numpy as np
+
+from lloyd_algorithm import (
+    ContinuousLloydAlgorithm,
+    DiscreteLloydAlgorithm,
+    MiniBatchLloydAlgorithm,
+)
+from update_rules import AndersonUpdate
+
+# Uniform samples of the rectangle approximate the continuous problem
+
+boundary = [[100, 100], [500, 100], [500, 500], [100, 500]]
+num_points = 9
+samples = np.random.default_rng(0).uniform((100, 100), (500, 500), (50_000, 2))
+
+discrete = DiscreteLloydAlgorithm(samples, num_points)
+result = discrete.run_simulation(200, atol=0.001)
+print(f"Discrete: {result.iterations} iterations ({result.stop_reason})")
+print(f"Distortion = {result.distortion:.2f}")
+
+continuous = ContinuousLloydAlgorithm(boundary, num_points)
+continuous.prototypes = result.prototypes
+continuous.cells = continuous.voronoi_partition()
+continuous.distortion = continuous.calculate_distortion()
+print(f"Continuous distortion at the same prototypes = {continuous.distortion:.2f}")
+print(abs(continuous.distortion - result.distortion) / continuous.distortion < 0.01)
+
+print("----------------------------------")
+
+# Weights act as sample multiplicities
+samples = np.array([[0, 0], [0, 1], [10, 0], [10, 1], [5, 5]], dtype=float)
+weights = np.array([1, 1, 1, 1, 0])
+discrete = DiscreteLloydAlgorithm(samples, 2, weights)
+discrete.prototypes = [[0, 0], [10, 1]]
+discrete.cells = discrete.voronoi_partition()
+print("Centroids", discrete.compute_centroids(discrete.cells))
+discrete.single_iteration()
+print("Distortion", discrete.distortion, discrete.distortion == 0.25)
+
+print("----------------------------------")
+
+# Accelerated updates work on the discrete variant too
+discrete = DiscreteLloydAlgorithm(
+    np.random.default_rng(1).normal(size=(20_000, 2)), 16, update_rule=AndersonUpdate()
+)
+result = discrete.run_simulation(500, rtol=1e-9)
+print(f"Anderson: {result.iterations} iterations ({result.stop_reason})")
+
+print("----------------------------------")
+
+# Mini-batch mode streaming from a memory-mapped .npy file
+samples = np.random.default_rng(2).uniform((100, 100), (500, 500), (200_000, 2))
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "samples.npy")
+    np.save(path, samples)
+    minibatch = MiniBatchLloydAlgorithm(num_points).fit(path, chunk_size=10_000)
+print(f"Mini-batch: {minibatch.num_samples} samples")
+print(f"Estimated distortion = {minibatch.distortion:.2f}")
+
+discrete = DiscreteLloydAlgorithm(samples, num_points)
+discrete.prototypes = minibatch.prototype_coords
+discrete.cells = discrete.voronoi_partition()
+print(f"Distortion = {discrete.calculate_distortion():.2f}")
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from distortion_minimization import load_boundary, main, prototype_range
+from result_store import ResultStore
+
+directory = tempfile.mkdtemp()
+boundary_path = os.path.join(directory, "holed.json")
+with open(boundary_path, "w") as file:
+    json.dump(
+        {
+            "exterior": [[0, 0], [10, 0], [10, 10], [0, 10]],
+            "holes": [[[4, 4], [6, 4], [6, 6], [4, 6]]],
+        },
+        file,
+    )
+print("Boundary", load_boundary(boundary_path).area)
+print("Ranges", list(prototype_range("5")), list(prototype_range("3:12:4")))
+
+# A single run, written as JSON
+output = os.path.join(directory, "run.json")
+main(["run", "-n", "8", "--boundary", boundary_path, "--atol", "1e-3", "-o", output])
+with open(output) as file:
+    result = json.load(file)
+print("Run", result["stop_reason"], len(result["prototypes"]), result["distortion"])
+
+# A study streamed to a result store
+store = os.path.join(directory, "results.bin")
+main(
+    ["study", "--range", "4:6", "--tests", "4", "--workers", "1", "--store", store]
+    + ["--backend", "vectorized"]
+)
+print("Study", len(ResultStore(store)), "records")
+
+# Argument errors exit before running anything: a second sweep on the same
+# store must choose between --append and --overwrite
+for argv in (["run", "-n", "5", "--resume"], ["study", "--store", store]):
+    try:
+        main(argv)
+    except SystemExit as error:
+        print("Refused", argv[0], "exit code", error.code)
+main(
+    ["study", "--range", "4", "--tests", "2", "--workers", "1", "--store", store]
+    + ["--append"]
+)
+print("Appended", len(ResultStore(store)), "records")
+
+# Headless subcommands never load matplotlib or tkinter
+code = (
+    "import sys, distortion_minimization as d;"
+    "d.main(['run', '-n', '5', '--iterations', '2', '-o', sys.argv[1]]);"
+    "print(sorted({'matplotlib', 'tkinter'} & set(sys.modules)))"
+)
+loaded = subprocess.run(
+    [sys.executable, "-c", code, os.devnull],
+    capture_output=True,
+    text=True,
+    cwd=os.path.dirname(os.path.abspath(__file__)),
+).stdout
+print("GUI modules loaded by run:", loaded.strip())
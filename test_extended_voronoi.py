@@ -1,9 +1,10 @@
 import random
 
 import numpy as np
+import shapely
 from matplotlib import pyplot as plt
 
-from extended_voronoi import ExtendedVoronoi
+from extended_voronoi import ExtendedVoronoi, IncrementalVoronoi
 from geometry_tools import Point, Polygon
 
 N_prototypes = 3
@@ -19,14 +20,88 @@ plt.xlim(round(x.min() - 1), round(x.max() + 1))
 plt.ylim(round(y.min() - 1), round(y.max() + 1))
 plt.plot(*points.T, "b.")
 
-diameter = np.linalg.norm(boundary.ptp(axis=0))
+diameter = np.linalg.norm(np.ptp(boundary, axis=0))
 points = Point.coords_to_points(points)
 boundary_polygon = Polygon(boundary)
 
-polygon_list = ExtendedVoronoi.region_split(boundary_polygon, points, diameter)
+polygon_list = ExtendedVoronoi.region_split(
+    boundary_polygon, points, diameter, validate=True
+)
 for point, p in polygon_list:
     print(p, "\n")
     x, y = zip(*p.exterior.coords)
     plt.plot(x, y, "r-")
 
+# batched clipping against the convex boundary matches shapely
+clipped = ExtendedVoronoi.partition(boundary_polygon, points, diameter, "clip")
+intersected = ExtendedVoronoi.partition(boundary_polygon, points, diameter, "shapely")
+print("Areas", np.allclose(clipped.areas(), intersected.areas()))
+print("Centroids", np.allclose(clipped.centroids(), intersected.centroids()))
+vectorized = ExtendedVoronoi.partition(boundary_polygon, points, diameter, "vectorized")
+print(
+    "Vectorized areas",
+    np.allclose(shapely.area(vectorized.geometries), clipped.areas()),
+)
+print(
+    "Region split areas",
+    np.allclose([p.area for _, p in polygon_list], clipped.areas()),
+)
+
+# warm-started diagram matches a fresh one along a Lloyd run
+voronoi = IncrementalVoronoi()
+lloyd_points = np.array(
+    [(random.uniform(0, 100), random.uniform(0, 100)) for _ in range(500)]
+)
+errors = 0
+for _ in range(50):
+    warm = ExtendedVoronoi.partition(
+        boundary_polygon, lloyd_points, diameter, voronoi=voronoi
+    )
+    fresh = ExtendedVoronoi.partition(boundary_polygon, lloyd_points, diameter)
+    if not np.allclose(warm.areas(), fresh.areas()):
+        errors += 1
+    lloyd_points = warm.centroids()
+print(errors, "error(s),", voronoi.rebuilds, "rebuild(s),", voronoi.flips, "flip(s)")
+
 plt.show()
+
+# non-convex boundary with a hole: the cells tile it exactly
+holed_boundary = Polygon(
+    shapely.Polygon(
+        [(0, 0), (100, 0), (100, 40), (40, 40), (40, 100), (0, 100)],
+        [[(10, 10), (20, 10), (20, 20), (10, 20)]],
+    )
+)
+inside = np.array(
+    [
+        (x, y)
+        for x, y in np.random.uniform(0, 100, (2000, 2))
+        if holed_boundary._polygon.contains(shapely.Point(x, y))
+    ][:300]
+)
+cells = ExtendedVoronoi.partition(holed_boundary, inside, diameter)
+print("Holed boundary area", np.isclose(cells.areas().sum(), holed_boundary.area))
+print(
+    "Holed boundary cells",
+    np.allclose(cells.areas(), shapely.area(cells.geometries)),
+)
+
+# Nearly collinear prototypes have far Voronoi vertices: the cells must still
+# cover the boundary and contain their own prototype
+uncovered = 0
+for seed in range(200):
+    triple = np.random.default_rng(seed).uniform(0, 100, (3, 2))
+    cells = ExtendedVoronoi.partition(boundary_polygon, triple, diameter, "clip")
+    owned = shapely.contains_xy(cells.to_geometries(), triple[:, 0], triple[:, 1])
+    uncovered += not (np.isclose(cells.areas().sum(), 10000) and owned.all())
+print("Uncovered random triples", uncovered)
+flat = np.array([[10, 50], [50, 50.001], [90, 50]])
+print(
+    "Nearly collinear",
+    sum(
+        cell.area
+        for _, cell in ExtendedVoronoi.region_split(
+            boundary_polygon, flat, diameter, validate=True
+        )
+    ),
+)
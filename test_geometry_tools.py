@@ -9,6 +9,7 @@ m = Point(1, 3)
 
 print(p1 == p2)
 print(p1 == p3)
+print(p1 != p3, p1 != 5)
 print(p1.distance(p3))
 print(p1.closest_point([p3, p4, m]))
 
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+# Modules that the core solve path must not load at import time
+OPTIONAL = ("matplotlib", "tkinter", "skspatial", "scipy.stats")
+# Generous bound on the import time of any of the modules below, in seconds
+TIME_LIMIT = 5.0
+
+
+def imported_modules(module):
+    # Fresh interpreter, so that nothing is already imported
+    code = f"import sys, time; start = time.perf_counter(); import {module}; "
+    code += "print(time.perf_counter() - start); print(*sorted(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout.split("\n")
+    return float(output[0]), set(output[1].split())
+
+
+results = {}
+for module in (
+    "lloyd_algorithm",
+    "batch_lloyd_algorithm",
+    "study",
+    "rendering",
+    "distortion_minimization",
+):
+    elapsed, modules = results[module] = imported_modules(module)
+    loaded = [name for name in OPTIONAL if name in modules]
+    print(f"{module}: {elapsed * 1000:.0f} ms, optional modules loaded: {loaded}")
+    assert not loaded, f"importing {module} loads {', '.join(loaded)}"
+    assert elapsed < TIME_LIMIT, f"importing {module} took {elapsed:.1f} s"
+
+# The command-line entry point defers even the solver until a subcommand runs
+print("CLI imports numpy:", "numpy" in results["distortion_minimization"][1])
+assert "numpy" not in results["distortion_minimization"][1]
@@ -0,0 +1,67 @@
+import time
+
+from geometry_tools import Point, Triangle
+from lean_geometry import LeanLine, LeanPoint, LeanPolygon, LeanTriangle
+
+a, b, c = LeanPoint(1, 2), LeanPoint(2, 3), LeanPoint(2, 4)
+m = LeanPoint(1, 3)
+
+line = LeanLine(a, b)
+print("Projection", line.get_projection_coordinate(m))
+print("perpendicular line", line.perpendicular_line(c))
+print("closest point", a.closest_point([b, c, m]))
+
+triangle = LeanTriangle([a.coords, b.coords, c.coords])
+polygon = LeanPolygon([a.coords, b.coords, c.coords, m.coords])
+print("Triangle", triangle.area, triangle.centroid)
+print("Average Square Distance:", triangle.average_square_distance(m))
+print("Polygon", polygon.area, polygon.centroid)
+print("Average Square Distance:", polygon.average_square_distance(m))
+
+# Cached invariants: the parallel axis evaluation matches the fan sum
+fan = polygon.divide_convex_polygon_to_triangles()
+fan.pop()
+print(
+    "Cached fan",
+    len(polygon.divide_convex_polygon_to_triangles()) == len(fan) + 1,
+    fan[0] is polygon.divide_convex_polygon_to_triangles()[0],
+)
+fan = polygon.divide_convex_polygon_to_triangles()
+print(
+    "Parallel axis",
+    abs(
+        polygon.average_square_distance(a)
+        - sum(t.average_square_distance(a) for t in fan)
+    )
+    < 1e-12,
+)
+print("Polar moment", polygon.polar_moment)
+
+# Clockwise rings have a negative signed area, but the same centroid and
+# integrals as counter-clockwise ones
+clockwise = LeanPolygon(polygon.vertices[::-1])
+print(
+    "Clockwise",
+    clockwise.signed_area == -polygon.signed_area,
+    clockwise.centroid == polygon.centroid,
+    abs(clockwise.polar_moment - polygon.polar_moment) < 1e-12,
+    abs(clockwise.average_square_distance(m) - polygon.average_square_distance(m))
+    < 1e-12,
+)
+
+try:
+    LeanTriangle([a.coords, a.coords, b.coords])
+except ValueError as e:
+    print("Rejected:", e)
+
+# Compare against the Shapely-backed shim, bypassing its cached lean view
+shim = Triangle([Point(*a.coords), Point(*b.coords), Point(*c.coords)])
+start = time.perf_counter()
+for _ in range(10000):
+    LeanTriangle(shim.lean.vertices).average_square_distance(m)
+lean_time = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(10000):
+    Triangle(shim._polygon).area
+shim_time = time.perf_counter() - start
+print(f"lean {lean_time:.3f}s, shapely shim construction + area {shim_time:.3f}s")
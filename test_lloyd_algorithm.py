@@ -1,4 +1,18 @@
-from lloyd_algorithm import ContinuousLloydAlgorithm
+import itertools
+import os
+import tempfile
+
+import numpy as np
+import shapely
+
+from initializers import (
+    KMeansPlusPlusInitializer,
+    LowDiscrepancyInitializer,
+    UniformInitializer,
+)
+from instrumentation import Instrumentation
+from lloyd_algorithm import ContinuousLloydAlgorithm, LloydAlgorithm
+from update_rules import AndersonUpdate, OverRelaxedUpdate
 
 # Define a boundary and number of points
 boundary = [[100, 100], [500, 100], [500, 500], [100, 500]]
@@ -7,4 +21,128 @@ num_points = 9  # Example number of points
 lloyd = ContinuousLloydAlgorithm(boundary, num_points)
 
 num_iterations = 200  # Example number of iterations
-lloyd.run_simulation(num_iterations)
+result = lloyd.run_simulation(num_iterations)
+print(f"Stopped after {result.iterations} iterations ({result.stop_reason})")
+print(f"Distortion = {result.distortion:.2f}")
+print("Final prototypes:")
+for x, y in result.prototypes:
+    print(f"({x}, {y})")
+
+print("----------------------------------")
+
+# Stop as soon as the distortion settles
+lloyd = ContinuousLloydAlgorithm(boundary, num_points)
+result = lloyd.run_simulation(num_iterations, atol=0.001)
+print(f"Stopped after {result.iterations} iterations ({result.stop_reason})")
+print(f"Distortion = {result.distortion:.2f}")
+
+print("----------------------------------")
+
+# Accelerated update rules
+for update_rule in [OverRelaxedUpdate(1.8), AndersonUpdate(5)]:
+    lloyd = ContinuousLloydAlgorithm(boundary, num_points, update_rule=update_rule)
+    result = lloyd.run_simulation(num_iterations, atol=0.001)
+    print(
+        f"{update_rule.__class__.__name__}: {result.iterations} iterations, "
+        f"distortion = {result.distortion:.2f}"
+    )
+
+print("----------------------------------")
+
+# Seeded initializers give reproducible runs
+for initializer in [
+    UniformInitializer(),
+    LowDiscrepancyInitializer("sobol"),
+    LowDiscrepancyInitializer("halton"),
+    KMeansPlusPlusInitializer(),
+]:
+    results = [
+        ContinuousLloydAlgorithm(
+            boundary, num_points, initializer=initializer, rng=42
+        ).run_simulation(num_iterations, atol=0.001)
+        for _ in range(2)
+    ]
+    print(
+        f"{initializer.__class__.__name__}: {results[0].iterations} iterations, "
+        f"distortion = {results[0].distortion:.2f}",
+        np.array_equal(results[0].prototypes, results[1].prototypes),
+    )
+
+# On a non-convex boundary with a hole, the low-discrepancy initializers
+# need several batches of candidate points
+holed_boundary = shapely.Polygon(
+    [(100, 100), (500, 100), (500, 250), (250, 250), (250, 500), (100, 500)],
+    [[(150, 150), (200, 150), (200, 200), (150, 200)]],
+)
+holed_polygon = LloydAlgorithm.boundary_shape(holed_boundary)
+for initializer in [
+    LowDiscrepancyInitializer("sobol"),
+    LowDiscrepancyInitializer("halton"),
+    KMeansPlusPlusInitializer(),
+]:
+    valid = 0
+    for num_prototypes, seed in itertools.product(range(3, 30), range(10)):
+        points = initializer(holed_polygon, num_prototypes, seed)
+        valid += len(points) == num_prototypes and bool(
+            shapely.contains_xy(holed_boundary, points[:, 0], points[:, 1]).all()
+        )
+    print(f"{initializer.__class__.__name__} on a holed boundary: {valid}/270")
+
+print("----------------------------------")
+
+# Per-phase timings, counters and events of an instrumented run
+events = []
+instrumentation = Instrumentation([lambda event, data: events.append(event)])
+lloyd = ContinuousLloydAlgorithm(
+    boundary, num_points, incremental=True, rng=0, instrumentation=instrumentation
+)
+result = lloyd.run_simulation(num_iterations, atol=0.001)
+print(instrumentation.report())
+print(instrumentation.counters["iterations"] == result.iterations)
+print(events.count("iteration") == result.iterations, events[-1] == "stop")
+
+print("----------------------------------")
+
+# Checkpoint a run, resume it in a new object and compare with a straight run
+checkpoint_path = os.path.join(tempfile.mkdtemp(), "lloyd.npz")
+straight = ContinuousLloydAlgorithm(
+    boundary, 50, incremental=True, update_rule=AndersonUpdate(), rng=1
+).run_simulation(40)
+ContinuousLloydAlgorithm(
+    boundary, 50, incremental=True, update_rule=AndersonUpdate(), rng=1
+).run_simulation(20, checkpoint_path=checkpoint_path, checkpoint_every=7)
+resumed = ContinuousLloydAlgorithm(
+    boundary, 50, incremental=True, update_rule=AndersonUpdate(), rng=1
+).resume_simulation(checkpoint_path, num_iterations=40)
+print(
+    f"Resumed to {resumed.iterations} iterations, bit-for-bit:",
+    np.array_equal(straight.prototypes, resumed.prototypes)
+    and straight.distortion_history == resumed.distortion_history,
+)
+
+print("----------------------------------")
+
+# Non-convex boundary with a hole
+lloyd = ContinuousLloydAlgorithm(holed_boundary, 50, rng=0)
+result = lloyd.run_simulation(num_iterations, atol=0.001)
+print(
+    f"Holed boundary: {result.iterations} iterations, distortion = {result.distortion:.2f}"
+)
+print(
+    "Cells tile the boundary",
+    np.isclose(lloyd.cells.areas().sum(), holed_boundary.area),
+    "prototypes inside",
+    lloyd.contains_points(result.prototypes),
+)
+
+# Centroids of cells bridging the arms of a thin C-shape lie outside it; the
+# steps are shortened so that the prototypes stay inside
+c_shape = shapely.Polygon(
+    [(0, 0), (100, 0), (100, 10), (10, 10), (10, 90), (100, 90), (100, 100), (0, 100)]
+)
+outside = 0
+for seed in range(20):
+    lloyd = ContinuousLloydAlgorithm(c_shape, 4, rng=seed)
+    result = lloyd.run_simulation(200, atol=0.001)
+    outside += not lloyd.contains_points(result.prototypes)
+print("C-shape runs with prototypes outside", outside)
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import shapely
+
+from geometry_tools import Point, Polygon, Triangle
+from packed_polygons import PackedPolygons
+
+# Compare the batched engine with the per-shape formulas
+
+triangle = Triangle([Point(1, 2), Point(2, 3), Point(2, 4)])
+m = Point(1, 3)
+packed = PackedPolygons.from_polygons([triangle])
+print("Second moment", packed.second_moments([(m.x, m.y)])[0])
+print("Expected", triangle.average_square_distance(m))
+
+print("----------------------------------")
+
+# test for random polygons, in both orientations
+print("Test polygons")
+nbr_test = 100
+polygons = []
+points = []
+for _ in range(nbr_test):
+    nbr_vertices = random.randint(3, 10)
+    polygon = Polygon(
+        [
+            Point(random.uniform(0, 100), random.uniform(0, 100))
+            for _ in range(nbr_vertices)
+        ]
+    ).convex_hull
+    if random.random() < 0.5:
+        polygon = Polygon(list(polygon.exterior.coords)[::-1])
+    polygons.append(polygon)
+    points.append(Point(random.uniform(0, 100), random.uniform(0, 100)))
+
+packed = PackedPolygons.from_polygons(polygons)
+moments = packed.second_moments([(p.x, p.y) for p in points])
+expected = [p.average_square_distance(q) for p, q in zip(polygons, points)]
+print("Second moments", np.allclose(moments, expected, rtol=1e-9))
+print("Areas", np.allclose(packed.areas(), [p.area for p in polygons]))
+print(
+    "Centroids",
+    np.allclose(packed.centroids(), [(p.centroid.x, p.centroid.y) for p in polygons]),
+)
+
+print("----------------------------------")
+
+# Polygons with holes and several parts, as returned by shapely
+print("Test rings")
+geometries = [
+    shapely.Polygon(
+        [(0, 0), (4, 0), (4, 4), (2, 1), (0, 4)][::-1],
+        [[(1, 0.5), (1.5, 0.5), (1.5, 1), (1, 1)]],
+    ),
+    shapely.MultiPolygon([shapely.box(10, 10, 11, 12), shapely.box(13, 10, 14, 11)]),
+    shapely.Polygon(),
+    shapely.box(0, 0, 1, 1),
+]
+packed = PackedPolygons.from_geometries(geometries)
+print("Areas", np.allclose(packed.areas(), shapely.area(geometries)))
+centroids = shapely.get_coordinates(shapely.centroid(geometries[:2] + geometries[3:]))
+print("Centroids", np.allclose(packed.take([0, 1, 3]).centroids(), centroids))
+holed = Polygon(geometries[0])
+print(
+    "Second moment",
+    np.isclose(
+        packed.second_moments([(1, 2)] * 4)[0],
+        holed.average_square_distance(Point(1, 2)),
+    ),
+)
+triangles, owners = packed.triangles()
+ab, ac = triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+print(
+    "Triangulated areas",
+    np.allclose(
+        np.bincount(owners, np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]) / 2, 4),
+        packed.areas(),
+    ),
+)
+reordered = PackedPolygons.concatenate([packed, packed]).take([4, 3, 0, 1])
+print("Take", np.allclose(reordered.areas(), packed.areas()[[0, 3, 0, 1]]))
@@ -0,0 +1,53 @@
+from math import factorial
+
+import numpy as np
+
+from lloyd_algorithm import ContinuousLloydAlgorithm
+from packed_polygons import PackedPolygons
+from quadrature import TriangleQuadrature
+
+# Monomials on the reference triangle: integral of x^i y^j is i! j! / (i + j + 2)!
+
+quadrature = TriangleQuadrature(3)
+nodes, weights = quadrature.nodes([[[0, 0], [1, 0], [0, 1]]])
+errors = 0
+for i in range(6):
+    for j in range(6 - i):
+        value = (weights * nodes[..., 0] ** i * nodes[..., 1] ** j).sum()
+        if not np.isclose(value, factorial(i) * factorial(j) / factorial(i + j + 2)):
+            errors += 1
+print(errors, "error(s)")
+
+print("----------------------------------")
+
+# Fan triangles of packed polygons cover the polygons
+packed = PackedPolygons.from_polygons(
+    [[(0, 0), (4, 0), (5, 2), (2, 4), (0, 3)], [(1, 1), (2, 1), (1, 2)]]
+)
+triangles, owners = packed.fan_triangles()
+_, weights = quadrature.nodes(triangles)
+print("Areas", np.bincount(owners, weights.sum(axis=1)), packed.areas())
+
+print("----------------------------------")
+
+# A uniform density reproduces the closed forms
+boundary = [[100, 100], [700, 100], [700, 400], [100, 400]]
+lloyd = ContinuousLloydAlgorithm(boundary, 20)
+weighted = ContinuousLloydAlgorithm(boundary, 20, density=lambda x, y: np.ones_like(x))
+weighted.prototypes = lloyd.prototype_coords
+weighted.cells = weighted.voronoi_partition()
+weighted.distortion = weighted.calculate_distortion()
+print("Distortion", np.isclose(weighted.distortion, lloyd.distortion))
+print(
+    "Centroids",
+    np.allclose(
+        weighted.compute_centroids(weighted.cells), lloyd.compute_centroids(lloyd.cells)
+    ),
+)
+
+print("----------------------------------")
+
+# A density increasing along x pulls prototypes to the right
+weighted = ContinuousLloydAlgorithm(boundary, 20, density=lambda x, y: x - 100)
+result = weighted.run_simulation(100, atol=0.001)
+print(f"Mean prototype x = {result.prototypes[:, 0].mean():.2f} (uniform: 400)")
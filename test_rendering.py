@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+import numpy as np
+import shapely
+
+from lloyd_algorithm import ContinuousLloydAlgorithm
+from rendering import Frame, FrameProducer, HeadlessRenderer, record_animation
+
+boundary = [[200, 200], [800, 200], [800, 500], [200, 500]]
+directory = tempfile.mkdtemp()
+
+# Headless recording of every 5th iteration as PNG frames, then as a GIF
+record_animation(
+    ContinuousLloydAlgorithm(boundary, 1000, rng=0),
+    os.path.join(directory, "frames"),
+    20,
+    every=5,
+)
+print("Frames", sorted(os.listdir(os.path.join(directory, "frames"))))
+
+path = os.path.join(directory, "lloyd.gif")
+record_animation(ContinuousLloydAlgorithm(boundary, 100, rng=0), path, 20)
+print("GIF written", os.path.getsize(path) > 0)
+
+# Without a consumer, only the latest frames are kept
+producer = FrameProducer(ContinuousLloydAlgorithm(boundary, 100, rng=0), 30, buffer=2)
+producer.start()
+producer.join()
+print("Pending frames", [frame and frame.iteration for frame in producer.frames.queue])
+
+# Cells with holes keep their rings in the frames, and are drawn with them
+holed = shapely.Polygon(boundary, [[[480, 340], [520, 340], [520, 360], [480, 360]]])
+lloyd = ContinuousLloydAlgorithm(holed, 3, rng=1)
+frame = Frame.capture(lloyd, 0)
+print(
+    "Holed frame",
+    len(frame.cells) == len(lloyd.cells),
+    np.allclose(frame.cells.areas(), lloyd.cells.areas()),
+)
+renderer = HeadlessRenderer(lloyd.boundary)
+renderer.draw(frame)
+renderer.figure.canvas.draw()
+x, y = renderer.axes.transData.transform((500, 350))
+pixels = np.asarray(renderer.figure.canvas.buffer_rgba())
+print("Hole left unfilled", pixels[pixels.shape[0] - int(y), int(x)].tolist())
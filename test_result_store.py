@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+import numpy as np
+
+from result_store import ResultStore, distortion_histogram
+from study import group_distortion_by_range, run_study
+
+boundary = [[100, 100], [700, 100], [700, 400], [100, 400]]
+path = os.path.join(tempfile.mkdtemp(), "results.bin")
+
+# Trials are streamed to the store as they complete
+store = run_study(boundary, range(4, 7), 10, workers=2, store=path)
+records = ResultStore(path).read()
+print("Records", len(records), records.dtype.names)
+distortion_dict = run_study(boundary, [5], 10, workers=1)[5][0]
+print(
+    "Same seeds as run_study",
+    np.array_equal(
+        records["distortion"][records["num_prototypes"] == 5],
+        [distortion_dict.get(i, (np.nan,))[0] for i in range(10)],
+        equal_nan=True,
+    ),
+)
+
+# Appending to an existing store keeps the earlier records
+store.add(4, 10, 0, 12, 3000.0, 0.1)
+print("Appended", len(ResultStore(path).select(4, passed=False)) == 11)
+
+# Vectorized grouping
+distortions = ResultStore(path).select(6)["distortion"]
+counts, edges = distortion_histogram(distortions, 2)
+print("Histogram", counts.sum() == len(distortions), np.all(np.diff(edges) > 0))
+grouped, total = group_distortion_by_range(
+    {i: (d, 0) for i, d in enumerate(distortions)}, 2
+)
+print("Grouped", grouped, total)
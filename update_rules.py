@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class LloydUpdate:
+    """Plain Lloyd step: every prototype moves to the centroid of its cell."""
+
+    accelerated = False
+
+    def propose(self, prototypes, centroids):
+        return centroids
+
+    def reset(self):
+        pass
+
+    def get_state(self) -> dict:
+        # Arrays holding the memory of the rule between iterations
+        return {}
+
+    def set_state(self, state):
+        pass
+
+
+class OverRelaxedUpdate(LloydUpdate):
+    """Over-relaxed Lloyd step, moving each prototype omega times as far as
+    the plain step would (1 < omega < 2)."""
+
+    accelerated = True
+
+    def __init__(self, omega=1.8):
+        self.omega = omega
+
+    def propose(self, prototypes, centroids):
+        return prototypes + self.omega * (centroids - prototypes)
+
+
+class AndersonUpdate(LloydUpdate):
+    """Anderson acceleration of the fixed point x = centroids(x), mixing
+    the last memory centroid steps by least squares on their residuals."""
+
+    accelerated = True
+
+    def __init__(self, memory=5, rcond=1e-10):
+        self.memory = memory
+        self.rcond = rcond
+        self.reset()
+
+    def reset(self):
+        self.residuals = []
+        self.images = []
+
+    def get_state(self) -> dict:
+        return {"residuals": np.array(self.residuals), "images": np.array(self.images)}
+
+    def set_state(self, state):
+        self.residuals = list(state["residuals"])
+        self.images = list(state["images"])
+
+    def propose(self, prototypes, centroids):
+        image = np.asarray(centroids, dtype=np.float64).ravel()
+        residual = image - np.asarray(prototypes, dtype=np.float64).ravel()
+        self.images = (self.images + [image])[-self.memory - 1 :]
+        self.residuals = (self.residuals + [residual])[-self.memory - 1 :]
+        if len(self.residuals) < 2:
+            return centroids
+
+        d_residuals = np.diff(self.residuals, axis=0).T
+        d_images = np.diff(self.images, axis=0).T
+        gamma = np.linalg.lstsq(d_residuals, residual, rcond=self.rcond)[0]
+        return (image - d_images @ gamma).reshape(np.shape(centroids))